@@ -0,0 +1,16 @@
+import pytest
+from core.middleware import QueryRecorder
+
+
+@pytest.fixture
+def query_recorder():
+    """Записывает все SQL-запросы, выполненные внутри теста."""
+    recorder = QueryRecorder()
+    with recorder.record():
+        yield recorder
+
+
+@pytest.fixture
+def strict_query_budget(settings):
+    """Превышение бюджета запросов view становится ошибкой."""
+    settings.QUERY_BUDGET_STRICT = True
@@ -0,0 +1,102 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts import urls as posts_urls
+from posts.models import Comment, Follow, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def followed_posts(mixer, user, group):
+    author = mixer.blend('auth.User')
+    Follow.objects.create(user=user, author=author)
+    posts = mixer.cycle(15).blend(Post, author=author, group=group)
+    post = posts[0]
+    mixer.cycle(15).blend(Comment, post=post, author=user)
+    return post
+
+
+def budget_urls(post):
+    return {
+        'index': reverse('posts:index'),
+        'search': reverse('posts:search') + '?q=a',
+        'group_list': reverse(
+            'posts:group_list', kwargs={'slug': post.group.slug}
+        ),
+        'profile': reverse(
+            'posts:profile', kwargs={'username': post.author.username}
+        ),
+        'post_detail': reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}
+        ),
+        'post_create': reverse('posts:post_create'),
+        'post_edit': reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+        'follow_index': reverse('posts:follow_index'),
+        'profile_unfollow': reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': post.author.username},
+        ),
+        'profile_follow': reverse(
+            'posts:profile_follow', kwargs={'username': post.author.username}
+        ),
+        'add_comment': reverse(
+            'posts:add_comment', kwargs={'post_id': post.pk}
+        ),
+    }
+
+
+class TestQueryBudget:
+
+    def test_every_view_declares_budget(self):
+        for pattern in posts_urls.urlpatterns:
+            assert hasattr(pattern.callback, 'query_budget'), (
+                f'Задайте бюджет запросов для `{pattern.name}` в posts/urls.py'
+            )
+
+    @pytest.mark.parametrize('name, data', [
+        ('index', None),
+        ('search', None),
+        ('group_list', None),
+        ('profile', None),
+        ('post_detail', None),
+        ('post_create', None),
+        ('post_create', {'text': 'Новый пост'}),
+        ('post_edit', None),
+        ('post_edit', {'text': 'Исправленный пост'}),
+        ('follow_index', None),
+        ('profile_unfollow', None),
+        ('profile_follow', None),
+        ('add_comment', {'text': 'Комментарий'}),
+    ])
+    def test_views_fit_budget(self, name, data, user, user_client,
+                              followed_posts, strict_query_budget):
+        cache.clear()
+        if name == 'post_edit':
+            followed_posts.author = user
+            followed_posts.save()
+        if name == 'profile_follow':
+            Follow.objects.filter(user=user).delete()
+        if name == 'post_create' and data is not None:
+            # самый дорогой путь: пост в группе расходится по лентам
+            # подписчиков автора
+            Follow.objects.create(user=followed_posts.author, author=user)
+            data = {**data, 'group': followed_posts.group.pk}
+        url = budget_urls(followed_posts)[name]
+        if data is None:
+            response = user_client.get(url)
+        else:
+            response = user_client.post(url, data)
+        assert response.status_code in (200, 302)
+        recorder = response.wsgi_request.query_recorder
+        assert not recorder.n_plus_one, (
+            f'Страница `{name}` повторяет запросы: {recorder.n_plus_one}'
+        )
+
+    @pytest.mark.parametrize('enabled', [True, False])
+    def test_query_headers_follow_setting(self, enabled, client, settings):
+        settings.QUERY_COUNT_HEADERS = enabled
+        response = client.get(reverse('posts:index'))
+        assert response.has_header('X-Query-Count') is enabled
+        assert response.has_header('X-Query-Time') is enabled
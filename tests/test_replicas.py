@@ -0,0 +1,73 @@
+import pytest
+from core.middleware import ReplicaPinningMiddleware
+from core.routers import ReplicaRouter, use_primary, use_replicas
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from posts.models import Post
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASES = {
+        **settings.DATABASES,
+        'replica0': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    }
+
+
+def routed(request):
+    """Прогоняет запрос через middleware и возвращает базу для чтения."""
+    seen = {}
+
+    def view(request):
+        seen['db'] = ReplicaRouter().db_for_read(Post)
+        return HttpResponse()
+
+    response = ReplicaPinningMiddleware(view)(request)
+    return seen['db'], response
+
+
+def test_router_without_replicas_reads_primary():
+    with use_replicas():
+        assert ReplicaRouter().db_for_read(Post) == 'default'
+
+
+def test_router_reads_replica_and_writes_primary(replica):
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == 'default', (
+        'Вне запросов (команды, миграции) чтения должны идти в основную базу'
+    )
+    with use_replicas():
+        assert router.db_for_read(Post) == 'replica0'
+        assert router.db_for_write(Post) == 'default'
+        with use_primary():
+            assert router.db_for_read(Post) == 'default', (
+                'Внутри use_primary() чтения должны идти в основную базу'
+            )
+    assert not router.allow_migrate('replica0', 'posts')
+
+
+def test_sessions_read_from_primary(replica):
+    with use_replicas():
+        assert ReplicaRouter().db_for_read(Session) == 'default', (
+            'Сессии нужно читать из основной базы: новой сессии может еще '
+            'не быть в реплике'
+        )
+
+
+def test_write_pins_following_reads(replica):
+    factory = RequestFactory()
+    db, response = routed(factory.get('/'))
+    assert db == 'replica0'
+    db, response = routed(factory.post('/create/'))
+    assert db == 'default'
+    assert 'use_primary' in response.cookies, (
+        'После записи клиент должен получить cookie для чтения из основной базы'
+    )
+    request = factory.get('/')
+    request.COOKIES['use_primary'] = '1'
+    db, _ = routed(request)
+    assert db == 'default', (
+        'Сразу после записи клиент должен читать свои изменения из основной базы'
+    )
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from core.cache import SQLiteCache
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(**options):
+        return SQLiteCache(str(tmp_path / 'cache.sqlite3'), {
+            'OPTIONS': {'CULL_EVERY': 1, **options},
+        })
+    return make
+
+
+def test_values_shared_between_instances(make_cache):
+    worker, other_worker = make_cache(), make_cache()
+    worker.set_many({'page': '<html>', 'count': 3, 'data': {'a': [1, 2]}})
+    assert other_worker.get_many(['page', 'count', 'data', 'missing']) == {
+        'page': '<html>', 'count': 3, 'data': {'a': [1, 2]},
+    }, 'Значения должны быть видны всем процессам, открывшим тот же файл'
+    other_worker.delete('page')
+    assert worker.get('page') is None
+
+
+def test_expiry_and_add(make_cache):
+    cache = make_cache()
+    cache.set('short', 1, 0.05)
+    assert cache.add('short', 2) is False
+    time.sleep(0.1)
+    assert cache.get('short') is None
+    assert cache.add('short', 2) is True
+    assert cache.get('short') == 2
+    assert cache.has_key('short')
+
+
+def test_incr_is_atomic(make_cache):
+    make_cache().set('version', 0, None)
+
+    def bump():
+        cache = make_cache()
+        for _ in range(50):
+            cache.incr('version')
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert make_cache().get('version') == 200, (
+        'Параллельные incr() не должны терять увеличения'
+    )
+    with pytest.raises(ValueError):
+        make_cache().incr('missing')
+
+
+def test_lru_eviction(make_cache):
+    cache = make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=5, ACCESS_RESOLUTION=0)
+    for i in range(10):
+        cache.set(f'key{i}', i)
+    time.sleep(0.01)
+    cache.get('key0')
+    cache.set('key10', 10)
+    assert cache.get('key0') == 0, 'Недавно прочитанный ключ не вытесняется'
+    assert cache.get('key1') is None, 'Давно не читавшийся ключ вытесняется'
+    assert len(cache.get_many([f'key{i}' for i in range(11)])) <= 10
@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+from core.cache import TieredCache
+
+
+@pytest.fixture
+def make_cache(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        'tiered_shared': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': str(tmp_path / 'cache.sqlite3'),
+        },
+    }
+
+    def make(process='worker', **options):
+        # память L1 общая для одного LOCATION; разные имена — разные процессы
+        return TieredCache(f'{tmp_path}:{process}', {'OPTIONS': {
+            'SHARED': 'tiered_shared', 'CHECK_INTERVAL': 0, **options,
+        }})
+    return make
+
+
+def test_hot_keys_served_from_memory(make_cache):
+    cache = make_cache()
+    cache.shared.set('group', {'title': 'Группа'})
+    assert cache.get('group') == {'title': 'Группа'}
+    first = cache.get('group')
+    first['title'] = 'Изменено'
+    assert cache.get('group') == {'title': 'Группа'}, (
+        'Изменяемые значения из памяти процесса должны отдаваться копией'
+    )
+    stats = cache.stats()
+    assert (stats['l1_hits'], stats['l1_misses']) == (2, 1)
+    assert (stats['shared_hits'], stats['shared_misses']) == (1, 0)
+
+
+def test_incr_and_delete_reach_other_processes(make_cache):
+    worker, other_worker = make_cache(), make_cache('other')
+    worker.set_many({'feed_version:index': 1, 'lookup:group:a': 'a'}, None)
+    assert other_worker.get('feed_version:index') == 1
+    assert other_worker.get('lookup:group:a') == 'a'
+    worker.incr('feed_version:index')
+    worker.delete('lookup:group:a')
+    assert other_worker.get('feed_version:index') == 2, (
+        'Новая версия ключа должна вытеснить старую из памяти других процессов'
+    )
+    assert other_worker.get('lookup:group:a') is None
+
+
+def test_lost_broadcasts_clear_memory(make_cache):
+    worker, other_worker = make_cache(), make_cache('other')
+    worker.set('page', 'old')
+    other_worker.get('page')
+    worker.shared.set('page', 'new')
+    worker.delete('other')
+    worker.shared.delete('tiered:invalidated:1')
+    assert other_worker.get('page') == 'new'
+
+
+def test_memory_bounded_in_bytes(make_cache):
+    cache = make_cache(L1_MAX_BYTES=32 * 1024)
+    for i in range(40):
+        cache.set(f'card:{i}', 'x' * 1000)
+    stats = cache.stats()
+    assert stats['l1_bytes'] <= 32 * 1024
+    assert stats['l1_entries'] < 40
+    assert cache.get('card:0') == 'x' * 1000, (
+        'Вытесненные из памяти ключи должны читаться из общего кеша'
+    )
+
+
+def test_overwrite_reaches_other_processes(make_cache):
+    worker, other_worker = make_cache(), make_cache('other')
+    worker.set('paginator:count:index', 10)
+    assert other_worker.get('paginator:count:index') == 10
+    worker.set('paginator:count:index', 11)
+    assert other_worker.get('paginator:count:index') == 11, (
+        'Перезапись ключа должна вытеснить старое значение из памяти '
+        'других процессов'
+    )
+    assert worker.stats()['l1_hits'] == 0
+    assert worker.get('paginator:count:index') == 11
+    assert worker.stats()['l1_hits'] == 1, (
+        'Своя рассылка не должна выбрасывать только что записанное значение'
+    )
+
+
+def test_threads_share_memory(make_cache):
+    cache = make_cache()
+    cache.set('group', 'Группа')
+    instances = []
+    thread = threading.Thread(target=lambda: instances.append(make_cache()))
+    thread.start()
+    thread.join()
+    assert instances[0].get('group') == 'Группа'
+    assert instances[0].stats()['l1_hits'] == 1, (
+        'Экземпляры кеша в разных потоках должны делить одну память'
+    )
+
+
+def test_only_overwrites_and_versions_broadcast(make_cache):
+    cache = make_cache(VERSIONED_PREFIXES=('feed_version:',))
+    cache.set_many({'card:1': 'a', 'card:2': 'b'})
+    cache.set('card:1', 'a')
+    assert cache.shared.get('tiered:generation') is None, (
+        'Первая запись ключа и запись того же значения не рассылаются'
+    )
+    cache.set('feed_version:index', 1)
+    assert cache.shared.get('tiered:generation') == 1, (
+        'Версии рассылаются даже при первой записи'
+    )
+    cache.set('card:1', 'c')
+    assert cache.shared.get('tiered:generation') == 2
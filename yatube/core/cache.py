@@ -0,0 +1,471 @@
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+    'expires REAL, accessed REAL NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+# столько ключей за один SELECT ... IN (...)
+CHUNK_SIZE = 500
+# такие значения отдаются из памяти процесса как есть, остальные — копией
+IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
+GENERATION_KEY = 'tiered:generation'
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite (WAL), общий для всех процессов на сервере.
+
+    Целые числа хранятся как INTEGER, поэтому incr() — один атомарный
+    UPDATE. При превышении MAX_ENTRIES удаляются просроченные записи, а
+    затем 1/CULL_FREQUENCY давно не читавшихся (LRU). Время последнего
+    чтения обновляется не чаще раза в ACCESS_RESOLUTION секунд, чтобы
+    чтения почти не превращались в записи.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        options = params.get('OPTIONS', {})
+        self.access_resolution = options.get('ACCESS_RESOLUTION', 1.0)
+        self.cull_every = options.get('CULL_EVERY', 64)
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def db(self):
+        # после fork соединение родителя использовать нельзя
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = self._connect()
+            local.pid = os.getpid()
+        return local.connection
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    def _encode(self, value):
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _keys(self, keys, version):
+        key_map = {}
+        for key in keys:
+            cache_key = self.make_key(key, version)
+            self.validate_key(cache_key)
+            key_map[cache_key] = key
+        return key_map
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = self._keys(keys, version)
+        if not key_map:
+            return {}
+        now = time.time()
+        found, stale = {}, []
+        cache_keys = list(key_map)
+        for start in range(0, len(cache_keys), CHUNK_SIZE):
+            chunk = cache_keys[start:start + CHUNK_SIZE]
+            rows = self.db.execute(
+                f'SELECT key, value, expires, accessed FROM cache '
+                f'WHERE key IN ({",".join("?" * len(chunk))})',
+                chunk,
+            )
+            for cache_key, value, expires, accessed in rows:
+                if expires is not None and expires <= now:
+                    continue
+                found[key_map[cache_key]] = self._decode(value)
+                if accessed < now - self.access_resolution:
+                    stale.append(cache_key)
+        if stale:
+            self.db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                [(now, cache_key) for cache_key in stale],
+            )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [
+            (self.make_key(key, version), self._encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        for cache_key, *_ in rows:
+            self.validate_key(cache_key)
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)', rows
+            )
+        self._maybe_cull(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_key(key, version)
+        self.validate_key(cache_key)
+        now = time.time()
+        cursor = self.db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+            'expires = excluded.expires, accessed = excluded.accessed '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (cache_key, self._encode(value),
+             self.get_backend_timeout(timeout), now, now),
+        )
+        self._maybe_cull(cursor.rowcount)
+        return cursor.rowcount > 0
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cache_key = self.make_key(key, version)
+        self.validate_key(cache_key)
+        now = time.time()
+        cursor = self.db.execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, cache_key, now),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_key(key, version)
+        self.validate_key(cache_key)
+        now = time.time()
+        row = self.db.execute(
+            'UPDATE cache SET value = value + ?, accessed = ? '
+            'WHERE key = ? AND typeof(value) = \'integer\' '
+            'AND (expires IS NULL OR expires > ?) RETURNING value',
+            (delta, now, cache_key, now),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def has_key(self, key, version=None):
+        cache_key = self.make_key(key, version)
+        self.validate_key(cache_key)
+        return self.db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (cache_key, time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        cache_keys = list(self._keys(keys, version))
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            for start in range(0, len(cache_keys), CHUNK_SIZE):
+                chunk = cache_keys[start:start + CHUNK_SIZE]
+                self.db.execute(
+                    f'DELETE FROM cache '
+                    f'WHERE key IN ({",".join("?" * len(chunk))})',
+                    chunk,
+                )
+
+    def clear(self):
+        self.db.execute('DELETE FROM cache')
+
+    def _maybe_cull(self, written):
+        self._writes += written
+        if self._writes < self.cull_every:
+            return
+        self._writes = 0
+        self.cull()
+
+    def cull(self):
+        """Удаляет просроченные записи и, если их все еще много, — LRU."""
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            )
+            count, = self.db.execute('SELECT count(*) FROM cache').fetchone()
+            if count <= self._max_entries:
+                return
+            excess = count - self._max_entries
+            if self._cull_frequency:
+                excess = max(excess, count // self._cull_frequency)
+            else:
+                excess = count
+            self.db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (excess,),
+            )
+
+    def close(self, **kwargs):
+        # соединение держится на поток все время жизни процесса
+        pass
+
+
+def _invalidated_key(generation):
+    return f'tiered:invalidated:{generation}'
+
+
+class _Memory:
+    """Память L1 одного LOCATION: записи LRU и состояние рассылок."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.generation = None
+        self.checked = 0
+        self.stats = dict.fromkeys(
+            ('l1_hits', 'l1_misses', 'shared_hits', 'shared_misses'), 0
+        )
+
+
+# обработчик caches создает экземпляр кеша на каждый поток, поэтому
+# память, как у LocMemCache, живет на уровне модуля: одна на LOCATION
+# для всех потоков процесса
+_memories = {}
+_memories_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """Небольшой LRU в памяти процесса перед общим кешем (SHARED).
+
+    Запись в памяти живет не дольше L1_TIMEOUT секунд, их суммарный
+    размер ограничен L1_MAX_BYTES на процесс: память общая для всех
+    потоков и экземпляров с одним LOCATION. incr, delete и перезапись
+    ключа другим значением рассылают измененные ключи через общий кеш:
+    номер поколения и список ключей на каждое поколение. Первая запись
+    ключа рассылается, только если он начинается с VERSIONED_PREFIXES:
+    версия, вытесненная из общего кеша, могла остаться в чужой памяти.
+    Остальные процессы сверяют поколение не чаще раза в CHECK_INTERVAL
+    секунд и выбрасывают перечисленные ключи, а если часть списков уже
+    потеряна — всю память целиком.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options['SHARED']
+        self.l1_timeout = options.get('L1_TIMEOUT', 10)
+        self.max_bytes = options.get('L1_MAX_BYTES', 16 * 1024 * 1024)
+        self.check_interval = options.get('CHECK_INTERVAL', 1.0)
+        self.log_length = options.get('INVALIDATION_LOG_LENGTH', 1000)
+        self.versioned_prefixes = tuple(options.get('VERSIONED_PREFIXES', ()))
+        with _memories_lock:
+            self._memory = _memories.setdefault(location, _Memory())
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def stats(self):
+        """Попадания и промахи по уровням с начала работы процесса."""
+        memory = self._memory
+        with memory.lock:
+            return {
+                **memory.stats,
+                'l1_entries': len(memory.entries),
+                'l1_bytes': memory.bytes,
+            }
+
+    def _remember(self, cache_key, value, timeout):
+        if isinstance(value, IMMUTABLE_TYPES):
+            stored, copied = value, False
+        else:
+            stored, copied = pickle.dumps(value, pickle.HIGHEST_PROTOCOL), True
+        size = sys.getsizeof(cache_key) + sys.getsizeof(stored)
+        if size > self.max_bytes // 16:
+            self._forget(cache_key)
+            return
+        expires = time.monotonic() + self.l1_timeout
+        if timeout is not None:
+            expires = min(expires, time.monotonic() + timeout)
+        memory = self._memory
+        with memory.lock:
+            self._pop(cache_key)
+            memory.entries[cache_key] = (stored, copied, expires, size)
+            memory.bytes += size
+            while memory.bytes > self.max_bytes:
+                memory.bytes -= memory.entries.popitem(last=False)[1][3]
+
+    def _pop(self, cache_key):
+        entry = self._memory.entries.pop(cache_key, None)
+        if entry is not None:
+            self._memory.bytes -= entry[3]
+
+    def _forget(self, *cache_keys):
+        with self._memory.lock:
+            for cache_key in cache_keys:
+                self._pop(cache_key)
+
+    def _clear_local(self):
+        with self._memory.lock:
+            self._memory.entries.clear()
+            self._memory.bytes = 0
+
+    def _sync(self):
+        """Применяет рассылки других процессов, не чаще CHECK_INTERVAL."""
+        memory = self._memory
+        now = time.monotonic()
+        if now - memory.checked < self.check_interval:
+            return
+        memory.checked = now
+        generation = self.shared.get(GENERATION_KEY, 0)
+        with memory.lock:
+            known = memory.generation
+            memory.generation = generation
+        if known is None or generation == known:
+            return
+        if not known < generation <= known + self.log_length:
+            self._clear_local()
+            return
+        logs = self.shared.get_many([
+            _invalidated_key(number)
+            for number in range(known + 1, generation + 1)
+        ])
+        if len(logs) < generation - known:
+            self._clear_local()
+            return
+        for cache_keys in logs.values():
+            self._forget(*cache_keys)
+
+    def _broadcast(self, cache_keys):
+        self._forget(*cache_keys)
+        self.shared.add(GENERATION_KEY, 0, None)
+        generation = self.shared.incr(GENERATION_KEY)
+        self.shared.set(
+            _invalidated_key(generation), list(cache_keys),
+            self.check_interval * 60,
+        )
+        # свою рассылку применять не нужно, если перед ней не было чужих
+        with self._memory.lock:
+            if self._memory.generation == generation - 1:
+                self._memory.generation = generation
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        key_map = {}
+        for key in keys:
+            cache_key = self.make_key(key, version)
+            self.validate_key(cache_key)
+            key_map[cache_key] = key
+        found, missing = {}, []
+        now = time.monotonic()
+        memory = self._memory
+        with memory.lock:
+            for cache_key, key in key_map.items():
+                entry = memory.entries.get(cache_key)
+                if entry is None or entry[2] <= now:
+                    missing.append(key)
+                    continue
+                memory.entries.move_to_end(cache_key)
+                found[key] = entry
+            memory.stats['l1_hits'] += len(found)
+            memory.stats['l1_misses'] += len(missing)
+        for key, (stored, copied, *_) in found.items():
+            found[key] = pickle.loads(stored) if copied else stored
+        if missing:
+            fetched = self.shared.get_many(missing, version)
+            with memory.lock:
+                memory.stats['shared_hits'] += len(fetched)
+                memory.stats['shared_misses'] += len(missing) - len(fetched)
+            for key, value in fetched.items():
+                self._remember(self.make_key(key, version), value, None)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        previous = self.shared.get_many(list(data), version)
+        failed = self.shared.set_many(data, timeout, version)
+        # старое значение могло остаться в памяти других процессов
+        changed = [
+            self.make_key(key, version) for key, value in data.items()
+            if self._overwrites(key, value, previous)
+        ]
+        if changed:
+            self._broadcast(changed)
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.shared.default_timeout
+        for key, value in data.items():
+            self._remember(self.make_key(key, version), value, timeout)
+        return failed
+
+    def _overwrites(self, key, value, previous):
+        if key in previous:
+            return previous[key] != value
+        return key.startswith(self.versioned_prefixes)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._forget(self.make_key(key, version))
+        return self.shared.add(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def has_key(self, key, version=None):
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version)
+        self._broadcast([self.make_key(key, version)])
+        return value
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return
+        self.shared.delete_many(keys, version)
+        self._broadcast([self.make_key(key, version) for key in keys])
+
+    def clear(self):
+        self._clear_local()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        # общий кеш закрывается сам как отдельный алиас CACHES
+        pass
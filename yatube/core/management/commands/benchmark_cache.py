@@ -0,0 +1,80 @@
+import json
+import random
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+
+
+def backends(directory, max_entries):
+    params = {'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    return {
+        'locmem': LocMemCache('benchmark', params),
+        'filebased': FileBasedCache(f'{directory}/files', params),
+        'sqlite': SQLiteCache(f'{directory}/cache.sqlite3', params),
+    }
+
+
+def measure(cache, operations, keys, value, rng):
+    """Операции в секунду для типичных обращений приложения к кешу."""
+    names = [f'key:{i}' for i in range(keys)]
+    results = {}
+
+    def timed(name, step, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            step()
+        results[name] = round(repeat / (time.perf_counter() - started))
+
+    timed('set', lambda: cache.set(rng.choice(names), value), operations)
+    timed('get', lambda: cache.get(rng.choice(names)), operations)
+    timed(
+        'get_many_10',
+        lambda: cache.get_many(rng.sample(names, 10)),
+        operations // 10,
+    )
+    timed(
+        'set_many_10',
+        lambda: cache.set_many(dict.fromkeys(rng.sample(names, 10), value)),
+        operations // 10,
+    )
+    cache.set('counter', 0, None)
+    timed('incr', lambda: cache.incr('counter'), operations)
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость SQLiteCache с LocMemCache и файловым кешем '
+        'на типичных операциях'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=5000)
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument(
+            '--value-size', type=int, default=2000,
+            help='Размер значения в байтах, примерно как карточка поста',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        value = 'x' * options['value_size']
+        report = {}
+        try:
+            for name, cache in backends(
+                directory, options['keys'] * 2
+            ).items():
+                report[name] = measure(
+                    cache, options['operations'], options['keys'], value,
+                    random.Random(options['seed']),
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        self.stdout.write(json.dumps(report, indent=2))
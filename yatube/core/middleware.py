@@ -0,0 +1,124 @@
+import logging
+from collections import Counter
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from .routers import use_replicas
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(view, budget):
+    """Помечает view допустимым числом SQL-запросов на один запрос."""
+    view.query_budget = budget
+    return view
+
+
+class QueryRecorder:
+    """Обертка execute_wrapper: SQL, время и повторы запросов."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, perf_counter() - started))
+
+    def record(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def duplicates(self):
+        """Одинаковый SQL (без учета параметров) и сколько раз он выполнен."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: total for sql, total in counts.items() if total > 1}
+
+    @property
+    def n_plus_one(self):
+        return {
+            sql: total for sql, total in self.duplicates.items()
+            if total >= settings.QUERY_N_PLUS_ONE_THRESHOLD
+        }
+
+
+class QueryCountMiddleware:
+    """Считает SQL-запросы каждого запроса и сверяет их с бюджетом view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        request.query_recorder = recorder
+        if settings.QUERY_COUNT_HEADERS:
+            response['X-Query-Count'] = recorder.count
+            response['X-Query-Time'] = f'{recorder.total_time * 1000:.2f}ms'
+        for sql, total in recorder.n_plus_one.items():
+            logger.warning(
+                'Похоже на N+1 в %s: %s раз %s', request.path, total, sql
+            )
+        budget = getattr(
+            getattr(request.resolver_match, 'func', None),
+            'query_budget',
+            None,
+        )
+        if budget is not None and recorder.count > budget:
+            message = (
+                f'{request.path}: {recorder.count} SQL-запросов '
+                f'при бюджете {budget}'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Читающие запросы обслуживает реплика, записи — основная база.
+
+    После POST и других изменяющих запросов клиент получает cookie на
+    REPLICA_PIN_SECONDS секунд: пока реплика догоняет, его чтения идут в
+    основную базу и он видит свои изменения.
+    """
+
+    cookie_name = 'use_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writing = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        if writing or self.cookie_name in request.COOKIES:
+            response = self.get_response(request)
+        else:
+            with use_replicas():
+                response = self.get_response(request)
+        if writing:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
@@ -0,0 +1,62 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_state = threading.local()
+
+
+@contextmanager
+def _route(replica):
+    stack = _state.__dict__.setdefault('stack', [])
+    stack.append(replica)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def use_replicas():
+    """Чтения внутри блока могут идти в реплику."""
+    return _route(True)
+
+
+def use_primary():
+    """Чтения внутри блока идут в основную базу, даже внутри use_replicas()."""
+    return _route(False)
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+class ReplicaRouter:
+    """Чтения в use_replicas() — в случайную реплику, остальное — в основную.
+
+    Вне use_replicas() (команды, миграции, фоновые задачи) реплики не
+    используются: им нужны только что записанные данные. Реплики
+    заполняются репликацией (для SQLite — командой sync_replicas), поэтому
+    Django в них не мигрирует.
+    """
+
+    def db_for_read(self, model, **hints):
+        stack = getattr(_state, 'stack', None)
+        aliases = replicas()
+        if (
+            not aliases or not stack or not stack[-1]
+            or model._meta.app_label in settings.REPLICA_EXCLUDED_APPS
+        ):
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,206 @@
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_safe
+
+from .feed_cache import (GROUPS, INDEX, author_scope, feed_etag,
+                         fresh_reads, group_scope, post_scope,
+                         timeline_scope)
+from .lookups import get_group_or_404, get_user_id_or_404
+from .models import Comment, Group, Post, User
+from .timeline import TimelinePaginator
+from .utils import COMMENT_ORDERING, CursorPaginator
+
+GROUP_ORDERING = ('slug',)
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+
+
+def api_view(get_scopes):
+    """GET-эндпоинт с ETag из версий областей кеша.
+
+    Если клиент прислал актуальный If-None-Match, ответ 304 отдается
+    после чтения версий из кеша, без запросов к базе.
+    """
+    def etag(request, *args, **kwargs):
+        return feed_etag(request, request.api_scopes)
+
+    def decorator(view):
+        conditional = require_safe(condition(etag_func=etag)(view))
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                request.api_scopes = get_scopes(request, *args, **kwargs)
+                with fresh_reads(request.api_scopes):
+                    return conditional(request, *args, **kwargs)
+            except Http404:
+                return json_response({'detail': 'Не найдено'}, status=404)
+        return wrapper
+    return decorator
+
+
+def user_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return json_response(
+                {'detail': 'Требуется авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+    }
+
+
+def serialize_post_detail(post):
+    # комментарии меняют только версию поста, поэтому их число есть
+    # лишь здесь, а не в списках с версиями лент
+    return {**serialize_post(post), 'comments_count': post.comments_count}
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def serialize_group(group):
+    return {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+
+
+def cursor_url(request, cursor):
+    if cursor is None:
+        return None
+    return f'{request.path}?{urlencode({"cursor": cursor})}'
+
+
+def paginated(request, paginator, serialize):
+    page = paginator.get_page(request.GET.get('cursor'))
+    return json_response({
+        'next': cursor_url(request, page.next_cursor),
+        'previous': cursor_url(request, page.previous_cursor),
+        'results': [serialize(item) for item in page],
+    })
+
+
+def post_list(posts):
+    return CursorPaginator(
+        posts.select_related('author', 'group'), settings.API_PAGE_SIZE
+    )
+
+
+@api_view(lambda request: (INDEX,))
+def posts(request):
+    return paginated(request, post_list(Post.objects.all()), serialize_post)
+
+
+@api_view(lambda request, post_id: (post_scope(post_id),))
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    return json_response(serialize_post_detail(post))
+
+
+@api_view(lambda request, post_id: (post_scope(post_id),))
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    paginator = CursorPaginator(
+        comments, settings.API_PAGE_SIZE, COMMENT_ORDERING
+    )
+    return paginated(request, paginator, serialize_comment)
+
+
+@api_view(lambda request: (GROUPS,))
+def groups(request):
+    paginator = CursorPaginator(
+        Group.objects.all(), settings.API_PAGE_SIZE, GROUP_ORDERING
+    )
+    return paginated(request, paginator, serialize_group)
+
+
+@api_view(
+    lambda request, slug: (group_scope(get_group_or_404(slug).pk), GROUPS)
+)
+def group_posts(request, slug):
+    group = get_group_or_404(slug)
+    return paginated(
+        request, post_list(Post.objects.filter(group=group)), serialize_post
+    )
+
+
+@api_view(
+    lambda request, username: (author_scope(get_user_id_or_404(username)),)
+)
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('counters'),
+        pk=get_user_id_or_404(username),
+    )
+    return json_response({
+        'username': author.username,
+        'first_name': author.first_name,
+        'last_name': author.last_name,
+        'posts_count': author.counters.posts_count,
+        'followers_count': author.counters.followers_count,
+        'following_count': author.counters.following_count,
+    })
+
+
+@api_view(
+    lambda request, username: (author_scope(get_user_id_or_404(username)),)
+)
+def profile_posts(request, username):
+    posts = Post.objects.filter(author_id=get_user_id_or_404(username))
+    return paginated(request, post_list(posts), serialize_post)
+
+
+def feed_scopes(request):
+    if not request.user.is_authenticated:
+        return ()
+    paginator = TimelinePaginator(request.user, settings.API_PAGE_SIZE)
+    # посты «звезд» не попадают в ленту при публикации
+    request.timeline_paginator = paginator
+    return (
+        timeline_scope(request.user.pk),
+        *(author_scope(author_id) for author_id in paginator.celebrity_ids),
+    )
+
+
+@user_required
+@api_view(feed_scopes)
+def follow_feed(request):
+    paginator = getattr(request, 'timeline_paginator', None) or (
+        TimelinePaginator(request.user, settings.API_PAGE_SIZE)
+    )
+    return paginated(request, paginator, serialize_post)
@@ -0,0 +1,37 @@
+from core.middleware import query_budget
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', query_budget(api.posts, 1), name='posts'),
+    path(
+        'posts/<int:post_id>/',
+        query_budget(api.post_detail, 1),
+        name='post_detail',
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        query_budget(api.post_comments, 2),
+        name='post_comments',
+    ),
+    path('groups/', query_budget(api.groups, 1), name='groups'),
+    path(
+        'groups/<slug:slug>/posts/',
+        query_budget(api.group_posts, 2),
+        name='group_posts',
+    ),
+    path(
+        'profiles/<str:username>/',
+        query_budget(api.profile, 2),
+        name='profile',
+    ),
+    path(
+        'profiles/<str:username>/posts/',
+        query_budget(api.profile_posts, 2),
+        name='profile_posts',
+    ),
+    path('feed/', query_budget(api.follow_feed, 5), name='follow_feed'),
+]
@@ -0,0 +1,177 @@
+import random
+import time
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from faker import Faker
+
+from .counters import recount
+from .follow_graph import forget_graph
+from .models import Comment, Follow, Group, Post, User
+from .search import rebuild_index
+from .timeline import fill_timelines
+
+BATCH_SIZE = 500
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index')
+
+
+def seed(users, groups, posts, comments, follows, alpha=1.2, seed=0):
+    """Заполняет базу воспроизводимым набором данных.
+
+    Подписки распределены по степенному закону: автор с рангом r
+    выбирается с весом 1 / r ** alpha.
+    """
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    User.objects.bulk_create(
+        (User(username=f'bench_{i}', first_name=fake.first_name(),
+              last_name=fake.last_name()) for i in range(users)),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith='bench_')
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    Group.objects.bulk_create(
+        (Group(title=fake.sentence(nb_words=3)[:200], slug=f'bench-{i}',
+               description=fake.paragraph()) for i in range(groups)),
+        batch_size=BATCH_SIZE,
+    )
+    group_ids = list(
+        Group.objects.filter(slug__startswith='bench-')
+        .values_list('pk', flat=True)
+    )
+    weights = list(accumulate(
+        1 / (rank + 1) ** alpha for rank in range(len(user_ids))
+    ))
+    Post.objects.bulk_create(
+        (Post(author_id=rng.choices(user_ids, cum_weights=weights)[0],
+              group_id=rng.choice(group_ids + [None]),
+              text=fake.paragraph(nb_sentences=5)) for _ in range(posts)),
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (Comment(post_id=rng.choice(post_ids),
+                 author_id=rng.choice(user_ids),
+                 text=fake.sentence()) for _ in range(comments)),
+        batch_size=BATCH_SIZE,
+    )
+    pairs = set()
+    for user_id in user_ids:
+        for author_id in rng.choices(user_ids, cum_weights=weights,
+                                     k=follows):
+            if author_id != user_id:
+                pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        (Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in sorted(pairs)),
+        batch_size=BATCH_SIZE,
+    )
+    recount()
+    forget_graph()
+    fill_timelines()
+    rebuild_index()
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def _targets(sample):
+    """Случайные адреса для каждого вида: (адрес, пользователь)."""
+    slugs = list(Group.objects.values_list('slug', flat=True)[:sample])
+    usernames = list(
+        User.objects.values_list('username', flat=True)[:sample]
+    )
+    post_ids = list(Post.objects.values_list('pk', flat=True)[:sample])
+    readers = list(
+        User.objects.filter(counters__following_count__gt=0)[:sample]
+    )
+    return {
+        'index': lambda rng: (reverse('posts:index'), None),
+        'group_posts': lambda rng: (
+            reverse('posts:group_list', kwargs={'slug': rng.choice(slugs)}),
+            None,
+        ),
+        'profile': lambda rng: (
+            reverse(
+                'posts:profile', kwargs={'username': rng.choice(usernames)}
+            ),
+            None,
+        ),
+        'post_detail': lambda rng: (
+            reverse(
+                'posts:post_detail', kwargs={'post_id': rng.choice(post_ids)}
+            ),
+            None,
+        ),
+        'follow_index': lambda rng: (
+            reverse('posts:follow_index'), rng.choice(readers)
+        ),
+    }
+
+
+def measure(requests, warm=False, seed=0, sample=1000):
+    """Замеряет время, число запросов к базе и объем ответа по видам."""
+    rng = random.Random(seed)
+    targets = _targets(sample)
+    results = {}
+    for view in VIEWS:
+        timings, queries, sizes = [], [], []
+        for _ in range(requests):
+            url, user = targets[view](rng)
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            if not warm:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+            sizes.append(len(response.content))
+        results[view] = {
+            'requests': requests,
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'bytes_mean': round(sum(sizes) / len(sizes)),
+        }
+    return results
+
+
+def compare(before, after):
+    """Строки отчета: изменение метрик второго прогона относительно первого."""
+    lines = []
+    for view, metrics in after['views'].items():
+        previous = before['views'].get(view)
+        if previous is None:
+            continue
+        for name, value in metrics.items():
+            old = previous.get(name)
+            if name == 'requests' or not old:
+                continue
+            lines.append(
+                f'{view:<14} {name:<13} {old:>12} -> {value:<12} '
+                f'{(value - old) / old:+.1%}'
+            )
+    return lines
+
+
+def environment():
+    return {
+        'database': settings.DATABASES['default']['ENGINE'],
+        'cache': settings.CACHES['default']['BACKEND'],
+        'per_page': settings.NUMBER_OF_POSTS,
+    }
@@ -0,0 +1,63 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserCounters
+
+
+def bump_user(user_id, **deltas):
+    """Сдвигает счетчики пользователя, не пересчитывая их.
+
+    Счетчик не уходит ниже нуля, даже если объекты создавались в обход
+    сигналов (bulk_create) и счетчик их не учел.
+    """
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **{
+            name: Greatest(F(name) + delta, 0)
+            for name, delta in deltas.items()
+        }
+    )
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        counters, created = UserCounters.objects.get_or_create(
+            user_id=user_id, defaults=deltas
+        )
+        if not created:
+            bump_user(user_id, **deltas)
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0)
+    )
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount():
+    """Пересчитывает все счетчики пакетными UPDATE-запросами."""
+    UserCounters.objects.bulk_create(
+        (
+            UserCounters(user_id=user_id)
+            for user_id in User.objects.filter(
+                counters__isnull=True
+            ).values_list('pk', flat=True)
+        ),
+        ignore_conflicts=True,
+    )
+    UserCounters.objects.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    Post.objects.update(comments_count=_count(Comment.objects.all(), 'post'))
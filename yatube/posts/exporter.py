@@ -0,0 +1,90 @@
+import csv
+import json
+import zlib
+
+from .models import Comment, Post
+
+CHUNK_SIZE = 2000
+# поля совпадают с форматом import_content, выгрузку можно загрузить обратно
+FIELDS = {
+    'post': (
+        Post,
+        ('id', 'author', 'group', 'text', 'pub_date'),
+        ('pk', 'author__username', 'group__slug', 'text', 'pub_date'),
+    ),
+    'comment': (
+        Comment,
+        ('id', 'post', 'author', 'text', 'created'),
+        ('pk', 'post_id', 'author__username', 'text', 'created'),
+    ),
+}
+KINDS = (*FIELDS, 'all')
+
+
+def iter_rows(kind, chunk_size=CHUNK_SIZE):
+    """Строки таблицы по возрастанию pk порциями через WHERE pk > последний.
+
+    В памяти одновременно держится только одна порция.
+    """
+    model, _, columns = FIELDS[kind]
+    queryset = model.objects.order_by('pk').values_list(*columns)
+    last = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def jsonl_lines(kinds, chunk_size=CHUNK_SIZE):
+    for kind in kinds:
+        names = FIELDS[kind][1]
+        for row in iter_rows(kind, chunk_size):
+            record = {'type': kind}
+            record.update(zip(names, map(_value, row)))
+            yield json.dumps(
+                record, ensure_ascii=False, separators=(',', ':')
+            ) + '\n'
+
+
+class _Line:
+    def write(self, value):
+        return value
+
+
+def csv_lines(kind, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS[kind][1])
+    for row in iter_rows(kind, chunk_size):
+        yield writer.writerow([_value(value) for value in row])
+
+
+def export_lines(kind, fmt, chunk_size=CHUNK_SIZE):
+    kinds = tuple(FIELDS) if kind == 'all' else (kind,)
+    if fmt == 'csv':
+        if len(kinds) > 1:
+            raise ValueError('CSV выгружается по одной таблице')
+        return csv_lines(kind, chunk_size)
+    return jsonl_lines(kinds, chunk_size)
+
+
+def gzip_stream(lines, flush_every=256 * 1024):
+    """Сжимает поток строк в gzip, отдавая блоки по мере накопления."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffered = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffered.append(data)
+        size += len(data)
+        if size >= flush_every:
+            block = compressor.compress(b''.join(buffered))
+            buffered, size = [], 0
+            if block:
+                yield block
+    yield compressor.compress(b''.join(buffered)) + compressor.flush()
@@ -0,0 +1,132 @@
+import hashlib
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from core.routers import use_primary
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+
+INDEX = 'index'
+SITE = 'site'
+GROUPS = 'groups'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def timeline_scope(user_id):
+    return f'timeline:{user_id}'
+
+
+def version_key(scope):
+    return f'feed_version:{scope}'
+
+
+def changed_key(scope):
+    return f'feed_changed:{scope}'
+
+
+def _initial_version():
+    # после вытеснения версия не должна повторить уже использованную
+    return int(time.time() * 1000)
+
+
+def get_versions(scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {
+        key: _initial_version() for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    scopes = set(scopes)
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(version_key(scope), _initial_version(), None)
+    cache.set_many(
+        {changed_key(scope): True for scope in scopes},
+        settings.REPLICA_PIN_SECONDS,
+    )
+
+
+def fresh_reads(scopes):
+    """Основная база для областей, измененных за REPLICA_PIN_SECONDS.
+
+    Реплика может еще не видеть изменение, а страница, собранная по
+    устаревшим данным, закешировалась бы под новой версией.
+    """
+    keys = [changed_key(scope) for scope in (*scopes, SITE)]
+    return use_primary() if cache.get_many(keys) else nullcontext()
+
+
+def feed_key_prefix(*scopes):
+    scopes = (*scopes, SITE)
+    versions = get_versions(scopes)
+    return 'feed:' + ':'.join(
+        f'{scope}.{version}' for scope, version in zip(scopes, versions)
+    )
+
+
+def cache_feed(get_scopes):
+    """Кеширует страницу ленты под ключом с версиями ее областей."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            scopes = get_scopes(*args, **kwargs)
+            cached_view = cache_page(
+                settings.FEED_CACHE_TIMEOUT,
+                key_prefix=feed_key_prefix(*scopes),
+            )(view)
+            with fresh_reads(scopes):
+                return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def feed_etag(request, scopes, per_user=False):
+    """ETag страницы: версии ее областей, адрес и, при надобности, читатель."""
+    prefix = feed_key_prefix(*scopes)
+    reader = request.user.pk if per_user else ''
+    digest = hashlib.md5(
+        f'{prefix}|{reader}|{request.get_full_path()}'.encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def conditional_feed(get_scopes, per_user=True):
+    """Отвечает 304, если версии областей страницы не менялись.
+
+    HTML зависит от вошедшего пользователя, поэтому он входит в ETag.
+    """
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: feed_etag(
+                request, get_scopes(*args, **kwargs), per_user=per_user
+            )
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with fresh_reads(get_scopes(*args, **kwargs)):
+                return conditional_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
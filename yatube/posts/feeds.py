@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import conditional_page
+
+from .feed_cache import (INDEX, author_scope, cache_feed, conditional_feed,
+                         group_scope)
+from .lookups import get_group_or_404, get_user_id_or_404
+from .models import Post, User
+
+
+class PostFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.select_related('author', 'group')[
+            :settings.SYNDICATION_ITEMS
+        ]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(8)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.edited
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group_id else ()
+
+
+class GroupFeed(PostFeed):
+    def get_object(self, request, slug):
+        return get_group_or_404(slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return group.posts.select_related('author', 'group')[
+            :settings.SYNDICATION_ITEMS
+        ]
+
+
+class AuthorFeed(PostFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, pk=get_user_id_or_404(username))
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return Post.objects.filter(author=author).select_related(
+            'author', 'group'
+        )[:settings.SYNDICATION_ITEMS]
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class AtomPostFeed(AtomMixin, PostFeed):
+    pass
+
+
+class AtomGroupFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AtomAuthorFeed(AtomMixin, AuthorFeed):
+    pass
+
+
+def cached(feed, get_scopes):
+    """Лента собирается один раз на версию своих областей кеша.
+
+    ETag отвечает 304 до обращения к кешу страниц, If-Modified-Since
+    сверяется с Last-Modified закешированного ответа.
+    """
+    return conditional_feed(get_scopes, per_user=False)(
+        conditional_page(cache_feed(get_scopes)(feed))
+    )
+
+
+def site_scopes():
+    return (INDEX,)
+
+
+def group_scopes(slug):
+    return (group_scope(get_group_or_404(slug).pk),)
+
+
+def author_scopes(username):
+    return (author_scope(get_user_id_or_404(username)),)
+
+
+site_rss = cached(PostFeed(), site_scopes)
+site_atom = cached(AtomPostFeed(), site_scopes)
+group_rss = cached(GroupFeed(), group_scopes)
+group_atom = cached(AtomGroupFeed(), group_scopes)
+author_rss = cached(AuthorFeed(), author_scopes)
+author_atom = cached(AtomAuthorFeed(), author_scopes)
@@ -0,0 +1,152 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from core.routers import use_primary
+from django.core.cache import cache
+
+from .models import Follow
+
+GENERATION_KEY = 'follow_graph:generation'
+# сколько хранить каждое изменение для остальных процессов
+CHANGE_TIMEOUT = 60 * 60
+# при большем отставании граф дешевле перечитать, чем догонять: после
+# сброса номер поколения начинается с текущих миллисекунд
+CHANGE_LOG_LENGTH = 1000
+
+
+def change_key(generation):
+    return f'follow_graph:change:{generation}'
+
+
+def _contains(ids, value):
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+class FollowGraph:
+    """Подписки в памяти процесса: отсортированные массивы id в обе стороны.
+
+    Загружается из Follow при первом обращении. Подписки и отписки этого
+    процесса применяются сразу, остальные процессы узнают о них из кеша:
+    номер поколения и изменение на каждое поколение. Если изменения уже
+    вытеснены (или кеш очищен), граф загружается заново.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._followers = {}
+        self._following = {}
+        self._generation = None
+
+    def reload(self):
+        followers, following = {}, {}
+        with use_primary():
+            generation = self._current_generation()
+            # порядок уникального индекса (user, author)
+            pairs = Follow.objects.order_by('user_id', 'author_id')
+            for user_id, author_id in pairs.values_list(
+                'user_id', 'author_id'
+            ).iterator():
+                following.setdefault(user_id, array('q')).append(author_id)
+                followers.setdefault(author_id, []).append(user_id)
+        with self._lock:
+            self._following = following
+            self._followers = {
+                author_id: array('q', sorted(user_ids))
+                for author_id, user_ids in followers.items()
+            }
+            self._generation = generation
+
+    def _current_generation(self):
+        # после сброса нумерация не должна повторить уже известную
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        return cache.get(GENERATION_KEY)
+
+    def sync(self):
+        """Применяет изменения других процессов или перечитывает граф."""
+        generation = cache.get(GENERATION_KEY)
+        known = self._generation
+        if known is not None and generation == known:
+            return
+        if known is None or generation is None or not (
+            known < generation <= known + CHANGE_LOG_LENGTH
+        ):
+            self.reload()
+            return
+        changes = cache.get_many([
+            change_key(number) for number in range(known + 1, generation + 1)
+        ])
+        if len(changes) < generation - known:
+            self.reload()
+            return
+        # get_many не обязан сохранять порядок ключей (TieredCache отдает
+        # сначала попадания в памяти), а подписку и отписку нельзя менять
+        # местами
+        with self._lock:
+            for number in range(known + 1, generation + 1):
+                self._apply(*changes[change_key(number)])
+            self._generation = max(self._generation, generation)
+
+    def _apply(self, user_id, author_id, followed):
+        for index, key, value in (
+            (self._followers, author_id, user_id),
+            (self._following, user_id, author_id),
+        ):
+            ids = index.setdefault(key, array('q'))
+            present = _contains(ids, value)
+            if followed and not present:
+                insort(ids, value)
+            elif not followed and present:
+                del ids[bisect_left(ids, value)]
+
+    def changed(self, user_id, author_id, followed):
+        """Подписка или отписка: применить здесь и разослать остальным."""
+        with self._lock:
+            self._apply(user_id, author_id, followed)
+        self._current_generation()
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            return
+        cache.set(
+            change_key(generation), (user_id, author_id, followed),
+            CHANGE_TIMEOUT,
+        )
+        with self._lock:
+            if self._generation == generation - 1:
+                self._generation = generation
+
+    def follows(self, user_id, author_id):
+        self.sync()
+        return _contains(self._following.get(user_id, ()), author_id)
+
+    def follow_states(self, user_id, author_ids):
+        """Из author_ids — те, на кого подписан пользователь."""
+        self.sync()
+        following = self._following.get(user_id, ())
+        return {
+            author_id for author_id in author_ids
+            if _contains(following, author_id)
+        }
+
+    def followers_count(self, author_id):
+        self.sync()
+        return len(self._followers.get(author_id, ()))
+
+    def following_ids(self, user_id):
+        self.sync()
+        return list(self._following.get(user_id, ()))
+
+    def follower_ids(self, author_id):
+        self.sync()
+        return list(self._followers.get(author_id, ()))
+
+
+graph = FollowGraph()
+
+
+def forget_graph():
+    """После массовых изменений Follow в обход сигналов: перечитать граф."""
+    cache.delete(GENERATION_KEY)
@@ -18,6 +18,12 @@ class PostForm(forms.ModelForm):
             'image': 'Картинка прикрипленная к посту'
         }
 
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            # размеры новой картинки запишет фоновая обработка
+            self.instance.image_width = self.instance.image_height = None
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.images import ImageFile
+
+from .feed_cache import INDEX, author_scope, bump, group_scope, post_scope
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# потоки пула создаются лениво, при первой задаче
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='post-images'
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def submit(task, *args):
+    """Запускает задачу в пуле после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: executor.submit(_run, task, *args))
+
+
+def _run(task, *args):
+    try:
+        task(*args)
+    except Exception:
+        logger.exception('Фоновая обработка картинки не удалась')
+    finally:
+        connections.close_all()
+
+
+class _ThumbnailName(Exception):
+    pass
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Находит миниатюру в хранилище sorl, но никогда ее не создает.
+
+    Имя файла миниатюры считает сам get_thumbnail со всеми своими
+    умолчаниями; поиск останавливается сразу после этого, до чтения
+    хранилища и оригинала.
+    """
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        raise _ThumbnailName(
+            super()._get_thumbnail_filename(source, geometry_string, options)
+        )
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        try:
+            self.get_thumbnail(file_, geometry_string, **options)
+        except _ThumbnailName as found:
+            name = found.args[0]
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+ready_backend = ReadyThumbnailBackend()
+
+
+def thumbnails_ready(name):
+    return all(
+        ready_backend.get_ready_thumbnail(name, geometry, **options)
+        for geometry, options in settings.POST_THUMBNAILS
+    )
+
+
+def _claim(name):
+    with _pending_lock:
+        if name in _pending:
+            return False
+        _pending.add(name)
+        return True
+
+
+def schedule_thumbnails(name):
+    """Ставит генерацию миниатюр в пул, если картинка еще не в очереди."""
+    def enqueue():
+        if _claim(name):
+            executor.submit(_run, _generate, name)
+    transaction.on_commit(enqueue)
+
+
+def generate_thumbnails(name):
+    if _claim(name):
+        _generate(name)
+
+
+def _generate(name):
+    try:
+        if thumbnails_ready(name):
+            return
+        for geometry, options in settings.POST_THUMBNAILS:
+            get_thumbnail(name, geometry, **options)
+    finally:
+        with _pending_lock:
+            _pending.discard(name)
+    # карточки и страницы лент могли закешироваться со ссылкой на оригинал
+    _touch(Post.objects.filter(image=name))
+
+
+def _touch(posts, **fields):
+    """Обновляет посты без сигналов и сбрасывает кеши их лент."""
+    scopes = {INDEX}
+    for pk, author_id, group_id in posts.values_list(
+        'pk', 'author_id', 'group_id'
+    ):
+        scopes.update((author_scope(author_id), post_scope(pk)))
+        if group_id:
+            scopes.add(group_scope(group_id))
+    posts.update(edited=timezone.now(), **fields)
+    bump(*scopes)
+
+
+def optimize(source):
+    """Уменьшает картинку до IMAGE_MAX_SIZE и пересжимает без EXIF.
+
+    Возвращает (данные, ширина, высота); данные None, если картинку
+    лучше оставить как есть — например, анимированный GIF.
+    """
+    with Image.open(source) as image:
+        if getattr(image, 'n_frames', 1) > 1:
+            return None, image.width, image.height
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((settings.IMAGE_MAX_SIZE, settings.IMAGE_MAX_SIZE))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert(
+                'RGBA' if 'transparency' in image.info else 'RGB'
+            )
+        output = BytesIO()
+        # info не передается в save, поэтому EXIF и прочие метаданные
+        # в новый файл не попадают
+        image.save(
+            output, settings.IMAGE_FORMAT, quality=settings.IMAGE_QUALITY
+        )
+        return output.getvalue(), image.width, image.height
+
+
+def process_image(post_id, name):
+    """Обрабатывает загруженный оригинал и готовит миниатюры."""
+    with default_storage.open(name) as source:
+        data, width, height = optimize(source)
+    new_name = name
+    if data is not None:
+        stem = os.path.splitext(name)[0]
+        new_name = default_storage.save(
+            f'{stem}.{settings.IMAGE_FORMAT.lower()}', ContentFile(data)
+        )
+    # пока шла обработка, автор мог заменить картинку
+    posts = Post.objects.filter(pk=post_id, image=name)
+    if not posts.exists():
+        if new_name != name:
+            default_storage.delete(new_name)
+        return
+    _touch(posts, image=new_name, image_width=width, image_height=height)
+    if new_name != name:
+        default_storage.delete(name)
+    generate_thumbnails(new_name)
+
+
+def schedule_image(post):
+    if post.image:
+        submit(process_image, post.pk, post.image.name)
@@ -0,0 +1,73 @@
+from core.routers import use_primary
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group, Post, User
+
+MISSING = 'missing'
+
+
+def group_key(slug):
+    return f'lookup:group:{slug}'
+
+
+def user_key(username):
+    return f'lookup:user:{username}'
+
+
+def post_author_key(post_id):
+    return f'lookup:post_author:{post_id}'
+
+
+def _cached(key, load):
+    value = cache.get(key)
+    if value is None:
+        # промах на отстающей реплике закешировался бы как «не найдено»
+        with use_primary():
+            value = load()
+        if value is None:
+            cache.set(key, MISSING, settings.LOOKUP_CACHE_MISS_TIMEOUT)
+            raise Http404
+        cache.set(key, value, settings.LOOKUP_CACHE_TIMEOUT)
+    if value == MISSING:
+        raise Http404
+    return value
+
+
+def get_group_or_404(slug):
+    return _cached(
+        group_key(slug), lambda: Group.objects.filter(slug=slug).first()
+    )
+
+
+def get_user_id_or_404(username):
+    return _cached(
+        user_key(username),
+        lambda: User.objects.filter(username=username)
+        .values_list('pk', flat=True)
+        .first(),
+    )
+
+
+def get_post_author_id_or_404(post_id):
+    return _cached(
+        post_author_key(post_id),
+        lambda: Post.objects.filter(pk=post_id)
+        .values_list('author_id', flat=True)
+        .first(),
+    )
+
+
+def forget_group(*slugs):
+    cache.delete_many([group_key(slug) for slug in slugs if slug])
+
+
+def forget_user(*usernames):
+    cache.delete_many(
+        [user_key(username) for username in usernames if username]
+    )
+
+
+def forget_post(post_id):
+    cache.delete(post_author_key(post_id))
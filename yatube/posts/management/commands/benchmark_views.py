@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает отдельную базу с тестовыми данными и замеряет задержки, '
+        'число запросов и объем ответов страниц постов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Сколько авторов в среднем выбирает каждый пользователь',
+        )
+        parser.add_argument('--alpha', type=float, default=1.2)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш перед каждым запросом',
+        )
+        parser.add_argument('--output', help='Файл для JSON с результатами')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        before = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as source:
+                    before = json.load(source)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать {error}')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            self.stdout.write('Заполняем базу...')
+            benchmark.seed(
+                options['users'], options['groups'], options['posts'],
+                options['comments'], options['follows'],
+                alpha=options['alpha'], seed=options['seed'],
+            )
+            self.stdout.write('Замеряем...')
+            views = benchmark.measure(
+                options['requests'], warm=options['warm'],
+                seed=options['seed'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        result = {
+            'params': {
+                name: options[name] for name in (
+                    'users', 'groups', 'posts', 'comments', 'follows',
+                    'alpha', 'requests', 'seed', 'warm',
+                )
+            },
+            'environment': benchmark.environment(),
+            'views': views,
+        }
+        report = json.dumps(result, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                target.write(report)
+        else:
+            self.stdout.write(report)
+        if before is not None:
+            for line in benchmark.compare(before, result):
+                self.stdout.write(line)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.recommendations import build_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «кого почитать» для всех пользователей'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = build_suggestions()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рекомендации пересчитаны: {total}')
+        )
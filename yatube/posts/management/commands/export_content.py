@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import CHUNK_SIZE, KINDS, export_lines, gzip_stream
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты и комментарии в JSONL или CSV порциями по pk, '
+        'не загружая таблицы в память целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=KINDS, default='all')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать выгрузку gzip'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            lines = export_lines(
+                options['kind'], options['format'], options['chunk_size']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['gzip']:
+            chunks = gzip_stream(lines)
+            target = (
+                open(options['output'], 'wb') if options['output']
+                else sys.stdout.buffer
+            )
+        else:
+            chunks = lines
+            target = (
+                open(options['output'], 'w', newline='')
+                if options['output'] else self.stdout
+            )
+        try:
+            for chunk in chunks:
+                target.write(chunk)
+        finally:
+            if options['output']:
+                target.close()
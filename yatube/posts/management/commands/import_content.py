@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import KINDS, Importer, ImportFormatError, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты, комментарии и подписки из JSONL или CSV '
+        'и в конце пересчитывает счетчики, поиск и ленты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с записями')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl'
+        )
+        parser.add_argument(
+            '--kind', choices=KINDS,
+            help='Тип записей: обязателен для CSV, для JSONL — поле type',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Журнал для продолжения прерванного импорта',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Сколько строк записывать в одной транзакции',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--skip-finish', action='store_true',
+            help='Не пересчитывать счетчики, поиск и ленты в конце',
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            checkpoint=options['checkpoint'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+        )
+        if importer.checkpoint.line:
+            self.stdout.write(
+                f'Продолжаем со строки {importer.checkpoint.line + 1}'
+            )
+        try:
+            with open(options['path'], newline='') as source:
+                stats = importer.run(
+                    read_records(source, options['format'], options['kind']),
+                    progress=self.progress,
+                )
+        except (OSError, ImportFormatError) as error:
+            raise CommandError(error)
+        for number, message in importer.errors:
+            self.stderr.write(f'Строка {number}: {message}')
+        if not options['skip_finish']:
+            self.stdout.write('Пересчитываем счетчики, поиск и ленты...')
+            importer.finish()
+        self.stdout.write(self.style.SUCCESS(
+            'Загружено: ' + ', '.join(
+                f'{kind} {count}' for kind, count in stats.items()
+            )
+        ))
+
+    def progress(self, line, stats, errors):
+        self.stdout.write(
+            f'строк {line}: ' + ', '.join(
+                f'{kind} {count}' for kind, count in stats.items()
+            ) + f', ошибок {len(errors)}'
+        )
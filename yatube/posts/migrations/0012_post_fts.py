@@ -0,0 +1,24 @@
+from django.db import migrations
+
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+    text, tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+FILL_INDEX = """
+INSERT INTO posts_post_fts(rowid, text) SELECT id, text FROM posts_post
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_edited'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [CREATE_INDEX, FILL_INDEX],
+            'DROP TABLE posts_post_fts',
+        ),
+    ]
@@ -0,0 +1,156 @@
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import islice
+from math import sqrt
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import Follow, Post, Suggestion, User, UserCounters
+
+# вклад общего подписчика и похожего по группам автора в оценку
+FRIEND_WEIGHT = 1.0
+SIMILAR_WEIGHT = 2.0
+# сколько похожих авторов помнить для каждого автора
+SIMILAR_AUTHORS = 20
+# кандидаты в похожие из каждой группы: самые активные в ней авторы;
+# без ограничения сравниваются все пары авторов группы
+SIMILAR_CANDIDATES = 50
+
+
+def follow_matrix():
+    """Разреженная матрица подписок: пользователь -> множество авторов."""
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        following[user_id].add(author_id)
+    return following
+
+
+def group_matrix():
+    """Разреженная матрица автор x группа: число постов автора в группе."""
+    posting = defaultdict(dict)
+    rows = (
+        Post.objects.filter(group__isnull=False)
+        .order_by()
+        .values_list('author_id', 'group_id')
+        .annotate(total=Count('pk'))
+    )
+    for author_id, group_id, total in rows.iterator():
+        posting[author_id][group_id] = total
+    return posting
+
+
+def similar_authors(posting, limit=SIMILAR_AUTHORS,
+                    candidates=SIMILAR_CANDIDATES):
+    """Ближайшие по косинусу векторов групп авторы для каждого автора.
+
+    Кандидаты берутся из обратного индекса группа -> авторы, урезанного
+    до candidates самых активных авторов группы: время растет линейно с
+    числом авторов, а не квадратично с размером групп.
+    """
+    by_group = defaultdict(list)
+    for author_id, groups in posting.items():
+        for group_id, total in groups.items():
+            by_group[group_id].append((total, author_id))
+    by_group = {
+        group_id: [
+            (author_id, total)
+            for total, author_id in nlargest(candidates, authors)
+        ]
+        for group_id, authors in by_group.items()
+    }
+    norms = {
+        author_id: sqrt(sum(total * total for total in groups.values()))
+        for author_id, groups in posting.items()
+    }
+    similar = {}
+    for author_id, groups in posting.items():
+        dot = Counter()
+        for group_id, total in groups.items():
+            for other_id, other_total in by_group[group_id]:
+                dot[other_id] += total * other_total
+        dot.pop(author_id, None)
+        similar[author_id] = nlargest(
+            limit,
+            (
+                (product / (norms[author_id] * norms[other_id]), other_id)
+                for other_id, product in dot.items()
+            ),
+        )
+    return similar
+
+
+def suggest(user_id, following, similar, popular, limit):
+    """Лучшие авторы для пользователя: (оценка, автор) по убыванию.
+
+    Друзья друзей — строка произведения матрицы подписок на себя, похожие
+    авторы — соседи по группам тех, кого пользователь читает, и его самого.
+    Недобор добивается самыми популярными авторами.
+    """
+    followed = following.get(user_id, set())
+    scores = Counter()
+    for author_id in followed:
+        for candidate_id in following.get(author_id, ()):
+            scores[candidate_id] += FRIEND_WEIGHT
+    for author_id in (*followed, user_id):
+        for similarity, candidate_id in similar.get(author_id, ()):
+            scores[candidate_id] += SIMILAR_WEIGHT * similarity
+    scores.pop(user_id, None)
+    for author_id in followed:
+        scores.pop(author_id, None)
+    best = nlargest(
+        limit, ((score, author_id) for author_id, score in scores.items())
+    )
+    for author_id in popular:
+        if len(best) >= limit:
+            break
+        if author_id != user_id and author_id not in followed and (
+            author_id not in scores
+        ):
+            best.append((0.0, author_id))
+    return best
+
+
+def build_suggestions(limit=None):
+    """Пересчитывает таблицу рекомендаций целиком, возвращает число строк."""
+    limit = limit or settings.SUGGESTIONS_PER_USER
+    following = follow_matrix()
+    similar = similar_authors(group_matrix())
+    popular = list(
+        UserCounters.objects.filter(followers_count__gt=0)
+        .order_by('-followers_count')
+        .values_list('user_id', flat=True)[:limit]
+    )
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    Suggestion.objects.all().delete()
+    rows = (
+        Suggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in users.iterator()
+        for score, author_id in suggest(
+            user_id, following, similar, popular, limit
+        )
+    )
+    # bulk_create сам превращает генератор в список, поэтому пачками
+    total = 0
+    while True:
+        batch = list(islice(rows, settings.TIMELINE_BATCH_SIZE))
+        if not batch:
+            return total
+        Suggestion.objects.bulk_create(batch)
+        total += len(batch)
+
+
+def suggestions_for(user):
+    """Рекомендации для показа одним запросом, без уже прочитанных авторов.
+
+    Таблица пересчитывается пакетно, поэтому подписки с тех пор
+    отсеиваются при чтении.
+    """
+    return [
+        suggestion.author
+        for suggestion in Suggestion.objects.filter(user=user)
+        .exclude(author__following__user=user)
+        .select_related('author')[:settings.SUGGESTIONS_SHOWN]
+    ]
@@ -0,0 +1,233 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import bump_comments, bump_user
+from .feed_cache import (GROUPS, INDEX, SITE, author_scope, bump,
+                         group_scope, post_scope)
+from .follow_graph import graph
+from .lookups import forget_group, forget_post, forget_user
+from .models import Comment, Follow, Group, Post, User, UserCounters
+from .search import index_post, unindex_post
+from .timeline import (author_unfollowed, expire_timelines, fan_out_post,
+                       timeline_readers)
+from .trending import (COMMENT_WEIGHT, FOLLOW_WEIGHT, POST_WEIGHT,
+                       initial_score, record_author, record_group,
+                       record_post)
+
+
+# поля, которые видны в карточках постов группы и автора
+GROUP_CARD_FIELDS = ('slug', 'title')
+AUTHOR_CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _stored_values(sender, instance, fields, update_fields):
+    """Значения полей в базе до сохранения, только сохраняемых сейчас."""
+    if update_fields:
+        fields = [field for field in fields if field in update_fields]
+    if instance.pk is None or not fields:
+        return {}
+    return sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def _stored_value(sender, instance, field, update_fields):
+    return _stored_values(sender, instance, [field], update_fields).get(field)
+
+
+def _changed(instance, stored):
+    return any(
+        getattr(instance, field) != value for field, value in stored.items()
+    )
+
+
+@receiver(post_save, sender=User)
+def create_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def score_new_post(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        instance.trend_score = initial_score()
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_user(instance.author_id, posts_count=1)
+        if instance.group_id is not None:
+            record_group(instance.group_id, POST_WEIGHT)
+        fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_user(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_post_lookup(sender, instance, **kwargs):
+    forget_post(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, update_fields=None, **kwargs):
+    instance._stored_group_id = _stored_value(
+        sender, instance, 'group_id', update_fields
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_feeds(sender, instance, **kwargs):
+    scopes = [INDEX, author_scope(instance.author_id), post_scope(instance.pk)]
+    for group_id in {
+        instance.group_id, getattr(instance, '_stored_group_id', None)
+    } - {None}:
+        scopes.append(group_scope(group_id))
+    bump(*scopes)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_timeline_readers(sender, instance, **kwargs):
+    # записи лент удалятся каскадом раньше post_delete
+    instance._timeline_readers = timeline_readers(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_timelines(sender, instance, created=False, raw=False,
+                          **kwargs):
+    # новый пост раскладывает по лентам post_created
+    if created or raw:
+        return
+    readers = getattr(instance, '_timeline_readers', None)
+    if readers is None:
+        readers = timeline_readers(instance.pk)
+    expire_timelines(readers)
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, **kwargs):
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_comments(instance.post_id, 1)
+        bump(post_scope(instance.post_id))
+        record_post(instance.post_id, COMMENT_WEIGHT)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    bump_comments(instance.post_id, -1)
+    bump(post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_user(instance.author_id, followers_count=1)
+        bump_user(instance.user_id, following_count=1)
+        bump(author_scope(instance.author_id), author_scope(instance.user_id))
+        graph.changed(instance.user_id, instance.author_id, True)
+        record_author(instance.author_id, FOLLOW_WEIGHT)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump_user(instance.author_id, followers_count=-1)
+    bump_user(instance.user_id, following_count=-1)
+    author_unfollowed(instance.author_id)
+    graph.changed(instance.user_id, instance.author_id, False)
+    bump(author_scope(instance.author_id), author_scope(instance.user_id))
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_card(sender, instance, update_fields=None, **kwargs):
+    instance._stored_card = _stored_values(
+        sender, instance, GROUP_CARD_FIELDS, update_fields
+    )
+    instance._stored_slug = instance._stored_card.get('slug')
+
+
+@receiver(post_save, sender=Group)
+def forget_group_lookup(sender, instance, update_fields=None, created=False,
+                        **kwargs):
+    # название и описание видны на странице группы и в списке групп
+    bump(GROUPS, group_scope(instance.pk))
+    if update_fields and 'slug' not in update_fields:
+        return
+    stored = getattr(instance, '_stored_slug', None)
+    if stored == instance.slug:
+        return
+    forget_group(instance.slug, stored)
+    if not created:
+        # ссылки на группу на всех страницах сайта
+        bump(SITE)
+
+
+@receiver(post_delete, sender=Group)
+def forget_deleted_group(sender, instance, **kwargs):
+    forget_group(instance.slug)
+    bump(SITE, GROUPS)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_card(sender, instance, update_fields=None, **kwargs):
+    instance._stored_card = _stored_values(
+        sender, instance, AUTHOR_CARD_FIELDS, update_fields
+    )
+    instance._stored_username = instance._stored_card.get('username')
+
+
+@receiver(post_save, sender=User)
+def forget_user_lookup(sender, instance, update_fields=None, created=False,
+                       **kwargs):
+    # вход (last_login) и смена пароля не трогают ни поиск, ни ленты
+    if update_fields and 'username' not in update_fields:
+        return
+    stored = getattr(instance, '_stored_username', None)
+    if stored == instance.username:
+        return
+    forget_user(instance.username, stored)
+    if not created:
+        bump(SITE)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_user(instance.username)
+    bump(SITE)
+
+
+@receiver(post_save, sender=Group)
+def touch_group_posts(sender, instance, created, raw=False, **kwargs):
+    # карточки постов показывают slug группы
+    if created or raw or not _changed(
+        instance, getattr(instance, '_stored_card', {})
+    ):
+        return
+    Post.objects.filter(group=instance).update(edited=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def touch_author_posts(sender, instance, created, raw=False, **kwargs):
+    # карточки постов показывают имя и username автора; закешированные
+    # страницы лент держат старые карточки
+    if created or raw or not _changed(
+        instance, getattr(instance, '_stored_card', {})
+    ):
+        return
+    Post.objects.filter(author=instance).update(edited=timezone.now())
+    bump(SITE)
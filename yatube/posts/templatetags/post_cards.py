@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+register = template.Library()
+
+
+def card_key(post, hide_author_links, hide_group_link):
+    stamp = int(post.edited.timestamp() * 1000000)
+    variant = f'{int(hide_author_links)}{int(hide_group_link)}'
+    return f'post_card:{post.pk}:{stamp}:{variant}'
+
+
+@register.simple_tag
+def post_cards(posts, hide_author_links=False, hide_group_link=False):
+    """Карточки постов страницы: одним get_many из кеша, остальное рендерим.
+
+    Возвращает пары (пост, html карточки).
+    """
+    posts = list(posts)
+    keys = [
+        card_key(post, hide_author_links, hide_group_link) for post in posts
+    ]
+    cached = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = cached.get(key)
+        if card is None:
+            card = rendered[key] = render_to_string(
+                'includes/general.html',
+                {
+                    'post': post,
+                    'hide_author_links': hide_author_links,
+                    'hide_group_link': hide_group_link,
+                },
+            )
+        cards.append((post, card))
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
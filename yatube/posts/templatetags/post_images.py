@@ -0,0 +1,17 @@
+from django import template
+
+from ..images import ready_backend, schedule_thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, geometry, **options):
+    """Адрес готовой миниатюры; пока она в очереди — адрес оригинала."""
+    if not image:
+        return ''
+    thumbnail = ready_backend.get_ready_thumbnail(image, geometry, **options)
+    if thumbnail:
+        return thumbnail.url
+    schedule_thumbnails(image.name)
+    return image.url
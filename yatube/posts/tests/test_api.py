@@ -0,0 +1,138 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание'
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост #{i}'
+            )
+        cls.post = Post.objects.latest('pk')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_posts_cursor_pages(self):
+        """Лента постов отдается страницами по курсору"""
+        response = self.client.get(reverse('api:posts'))
+        data = response.json()
+        newest = Post.objects.order_by('-pk').values_list('pk', flat=True)
+        self.assertEqual(
+            [post['id'] for post in data['results']], list(newest[:2])
+        )
+        self.assertEqual(data['results'][0]['author'], 'api_author')
+        self.assertEqual(data['results'][0]['group'], 'api-group')
+        self.assertIsNone(data['previous'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+
+    def test_not_modified(self):
+        """Неизменная лента отдает 304 без запросов к базе"""
+        url = reverse('api:group_posts', kwargs={'slug': self.group.slug})
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, group=self.group, text='Еще')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_changes_post_etag(self):
+        """Новый комментарий меняет ETag поста и его комментариев"""
+        urls = (
+            reverse('api:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('api:post_comments', kwargs={'post_id': self.post.pk}),
+        )
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Ответ'
+        )
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(urls[0]).json()['comments_count'], 2)
+
+    def test_lists_omit_comments_count(self):
+        """В списках нет числа комментариев: комментарий не меняет их ETag"""
+        url = reverse('api:posts')
+        response = self.client.get(url)
+        self.assertNotIn('comments_count', response.json()['results'][0])
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Ответ'
+        )
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_not_found(self):
+        """Несуществующие объекты дают JSON с кодом 404"""
+        for url in (
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            reverse('api:profile', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', response.json())
+
+    def test_follow_feed(self):
+        """Лента подписок требует входа и меняется при подписке"""
+        url = reverse('api:follow_feed')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        etag = self.client.get(url)['ETag']
+        self.client.get(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username},
+            )
+        )
+        self.assertTrue(Follow.objects.filter(user=self.reader).exists())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_follow_feed_sees_edits_and_deletes(self):
+        """Правка и удаление поста меняют ETag ленты подписок"""
+        self.client.force_login(self.reader)
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+        url = reverse('api:follow_feed')
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['text'], 'Исправленный пост'
+        )
+        post.delete()
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(
+            'Исправленный пост',
+            [item['text'] for item in response.json()['results']],
+        )
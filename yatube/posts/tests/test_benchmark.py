@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from .. import benchmark
+from ..models import Follow, Group, Post, TimelineEntry, User
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_is_reproducible(self):
+        """Один и тот же seed дает один и тот же граф подписок"""
+        benchmark.seed(20, 2, 50, 30, 5, seed=7)
+        follows = list(
+            Follow.objects.values_list('user__username', 'author__username')
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(
+            TimelineEntry.objects.count(),
+            Post.objects.filter(author__following__isnull=False).count(),
+        )
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        benchmark.seed(20, 2, 50, 30, 5, seed=7)
+        self.assertEqual(
+            list(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            follows,
+        )
+
+    def test_measure_reports_every_view(self):
+        """Отчет содержит перцентили, запросы и объем для каждой страницы"""
+        benchmark.seed(10, 2, 30, 10, 3)
+        results = benchmark.measure(3)
+        self.assertEqual(set(results), set(benchmark.VIEWS))
+        for metrics in results.values():
+            self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+            self.assertGreater(metrics['queries_max'], 0)
+            self.assertGreater(metrics['bytes_mean'], 0)
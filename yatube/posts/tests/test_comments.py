@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='comment_author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        cls.post.comments_count = 5
+        cls.post.save()
+        cls.comments = list(Comment.objects.order_by('-created', '-id'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_first_page_rendered_with_count(self):
+        """Пост показывает первую страницу комментариев и их общее число"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        page = response.context['comments']
+        self.assertEqual(list(page), self.comments[:3])
+        self.assertContains(response, 'Комментарии: 5')
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+
+    def test_next_page_fragment(self):
+        """Следующая страница отдается фрагментом без шаблона страницы"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        cursor = response.context['comments'].next_cursor
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': cursor},
+        )
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(list(response.context['comments']), self.comments[3:])
+        self.assertNotContains(response, 'data-more-comments')
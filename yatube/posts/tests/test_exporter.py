@@ -0,0 +1,60 @@
+import gzip
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..exporter import iter_rows
+from ..models import Comment, Post, User
+
+
+class ExportContentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='export_author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост #{i}') for i in range(5)
+        )
+        cls.post = Post.objects.order_by('pk').first()
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий'
+        )
+
+    def test_rows_walk_in_chunks(self):
+        """Обход по порциям отдает все строки по возрастанию pk"""
+        with self.assertNumQueries(3):
+            ids = [row[0] for row in iter_rows('post', chunk_size=2)]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        )
+
+    def test_command_writes_jsonl(self):
+        """Команда выгружает посты, затем комментарии в формате импорта"""
+        output = StringIO()
+        call_command('export_content', stdout=output)
+        records = [
+            json.loads(line) for line in output.getvalue().splitlines()
+        ]
+        self.assertEqual(
+            [record['type'] for record in records], ['post'] * 5 + ['comment']
+        )
+        self.assertEqual(records[0]['author'], 'export_author')
+        self.assertEqual(records[-1]['post'], self.post.pk)
+
+    def test_endpoint_for_staff_only(self):
+        """Потоковая выгрузка доступна только персоналу"""
+        url = reverse('posts:export', kwargs={'kind': 'comment'})
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client.force_login(staff)
+        response = client.get(url, {'format': 'csv', 'gzip': 1})
+        self.assertTrue(response.streaming)
+        content = gzip.decompress(b''.join(response.streaming_content))
+        lines = content.decode().splitlines()
+        self.assertEqual(lines[0], 'id,post,author,text,created')
+        self.assertEqual(len(lines), 2)
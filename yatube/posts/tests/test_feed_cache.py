@@ -0,0 +1,128 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..feed_cache import SITE, get_versions
+from ..models import Comment, Group, Post, User
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cached_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='cached-feed', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост'
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_pages_served_from_cache(self):
+        """Повторный запрос ленты не обращается к базе"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+
+    def test_new_post_shows_immediately(self):
+        """Новый пост сразу виден во всех лентах"""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Свежая запись'
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежая запись')
+
+    def test_group_rename_expires_pages(self):
+        """Изменение группы сбрасывает закешированные ленты"""
+        self.client.get(self.urls[0])
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.client.get(self.urls[1])
+        self.assertContains(response, 'Новое название')
+
+    def test_unrelated_saves_keep_site_pages(self):
+        """Сохранение без смены username и slug не сбрасывает весь сайт"""
+        self.client.get(self.urls[0])
+        versions = get_versions([SITE])
+        author = User.objects.get(pk=self.author.pk)
+        group = Group.objects.get(pk=self.group.pk)
+        self.client.force_login(author)
+        author.set_password('new-password')
+        author.save()
+        group.description = 'Новое описание'
+        group.save()
+        self.assertEqual(get_versions([SITE]), versions)
+        author.username = 'renamed_author'
+        author.save()
+        self.assertNotEqual(get_versions([SITE]), versions)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='etag-group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        cls.urls = (
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def etags(self):
+        return [self.client.get(url)['ETag'] for url in self.urls]
+
+    def test_unchanged_pages_not_modified(self):
+        """Неизменная страница отдает 304 без рендеринга"""
+        for url, etag in zip(self.urls, self.etags()):
+            with self.subTest(url=url):
+                with self.assertTemplateNotUsed('posts/general.html'):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_refresh_etag(self):
+        """Новый пост или комментарий меняет ETag страниц"""
+        etags = self.etags()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.assertNotEqual(self.etags()[2], etags[2])
+        etags = self.etags()
+        Post.objects.create(author=self.author, group=self.group, text='Еще')
+        for url, old, new in zip(self.urls, etags, self.etags()):
+            with self.subTest(url=url):
+                self.assertNotEqual(old, new)
+
+    def test_etag_depends_on_reader(self):
+        """Вошедший пользователь получает свой ETag"""
+        etag = self.etags()[2]
+        self.client.force_login(self.author)
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='feed_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='feed-group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Запись для ленты'
+        )
+        cls.urls = (
+            reverse('posts:site_rss'),
+            reverse('posts:site_atom'),
+            reverse('posts:group_rss', kwargs={'slug': cls.group.slug}),
+            reverse('posts:group_atom', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:author_rss', kwargs={'username': cls.author.username}
+            ),
+            reverse(
+                'posts:author_atom', kwargs={'username': cls.author.username}
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_list_posts(self):
+        """RSS и Atom отдают записи сайта, группы и автора"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Запись для ленты')
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_polling_is_cheap(self):
+        """Повторный опрос отдается из кеша или ответом 304"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+                    cached = self.client.get(
+                        url,
+                        HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                    )
+                    self.assertEqual(cached.status_code, 304)
+                    cached = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                    self.assertEqual(cached.status_code, 304)
+
+    def test_new_post_refreshes_feed(self):
+        """Новая запись сразу попадает в закешированную ленту"""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Свежая запись'
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежая запись')
@@ -0,0 +1,107 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..follow_graph import CHANGE_LOG_LENGTH, FollowGraph, forget_graph, graph
+from ..models import Follow, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='graph_reader')
+        cls.authors = [
+            User.objects.create_user(username=f'graph_author_{i}')
+            for i in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=cls.reader, author=author)
+            for author in cls.authors[:2]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_loaded_from_follow(self):
+        """Граф загружается из Follow и отвечает без запросов к базе"""
+        graph.sync()
+        author_ids = [author.pk for author in self.authors]
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.follows(self.reader.pk, author_ids[0]))
+            self.assertFalse(graph.follows(self.reader.pk, author_ids[2]))
+            self.assertEqual(
+                graph.follow_states(self.reader.pk, author_ids),
+                set(author_ids[:2]),
+            )
+            self.assertEqual(graph.followers_count(author_ids[0]), 1)
+            self.assertEqual(graph.following_ids(self.reader.pk),
+                             author_ids[:2])
+
+    def test_changes_reach_other_processes(self):
+        """Подписки и отписки доходят до графов других процессов"""
+        other_process = FollowGraph()
+        other_process.sync()
+        author = self.authors[2]
+        Follow.objects.create(user=self.reader, author=author)
+        with self.assertNumQueries(0):
+            self.assertTrue(other_process.follows(self.reader.pk, author.pk))
+        Follow.objects.filter(user=self.reader, author=author).delete()
+        with self.assertNumQueries(0):
+            self.assertFalse(other_process.follows(self.reader.pk, author.pk))
+            self.assertEqual(other_process.follower_ids(author.pk), [])
+
+    def test_changes_applied_in_order(self):
+        """Изменения применяются по порядку поколений, а не ответа кеша"""
+        other_process = FollowGraph()
+        other_process.sync()
+        author = self.authors[2]
+        Follow.objects.create(user=self.reader, author=author)
+        Follow.objects.filter(user=self.reader, author=author).delete()
+        get_many = cache.get_many
+
+        def reversed_get_many(keys, *args, **kwargs):
+            found = get_many(keys, *args, **kwargs)
+            return dict(reversed(list(found.items())))
+
+        with mock.patch.object(cache, 'get_many', reversed_get_many):
+            self.assertFalse(other_process.follows(self.reader.pk, author.pk))
+
+    def test_forget_graph_reloads(self):
+        """После массовых изменений граф перечитывается из базы"""
+        graph.sync()
+        Follow.objects.bulk_create(
+            [Follow(user=self.authors[2], author=self.reader)]
+        )
+        forget_graph()
+        self.assertTrue(graph.follows(self.authors[2].pk, self.reader.pk))
+
+    def test_forget_graph_reaches_other_processes(self):
+        """После сброса другие процессы перечитывают граф, а не догоняют"""
+        other_process = FollowGraph()
+        other_process.sync()
+        forget_graph()
+        author = self.authors[2]
+        later = time.time() + 60
+        with mock.patch('posts.follow_graph.time.time', return_value=later):
+            Follow.objects.create(user=self.reader, author=author)
+        with mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many:
+            self.assertTrue(other_process.follows(self.reader.pk, author.pk))
+        for call in get_many.call_args_list:
+            self.assertLessEqual(len(call[0][0]), CHANGE_LOG_LENGTH)
+
+    def test_profile_shows_follow_state(self):
+        """Профиль берет состояние подписки из графа"""
+        client = Client()
+        client.force_login(self.reader)
+        for author, following in zip(self.authors, (True, True, False)):
+            with self.subTest(author=author.username):
+                response = client.get(reverse(
+                    'posts:profile', kwargs={'username': author.username}
+                ))
+                self.assertEqual(response.context['following'], following)
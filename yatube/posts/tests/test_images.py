@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from ..images import (
+    generate_thumbnails, process_image, ready_backend, thumbnails_ready,
+)
+from ..models import Post, User
+from ..templatetags.post_images import thumbnail_url
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='image_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def test_original_until_generated(self):
+        """Пока миниатюры нет, шаблон получает адрес оригинала"""
+        self.assertEqual(
+            thumbnail_url(self.post.image, '960x339', crop='center'),
+            self.post.image.url,
+        )
+
+    def test_generated_thumbnail_used(self):
+        """После фоновой генерации шаблон получает миниатюру"""
+        edited = self.post.edited
+        generate_thumbnails(self.post.image.name)
+        self.assertTrue(thumbnails_ready(self.post.image.name))
+        url = thumbnail_url(
+            self.post.image, '960x339', crop='center', upscale=True
+        )
+        self.assertNotEqual(url, self.post.image.url)
+        self.assertTrue(url.startswith(settings.MEDIA_URL + 'cache/'))
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.edited, edited)
+
+    def test_pending_thumbnail_queued_once(self):
+        """Страница с картинкой в очереди не ставит ее в пул повторно"""
+        with mock.patch(
+            'posts.images.transaction.on_commit',
+            side_effect=lambda func: func(),
+        ), mock.patch('posts.images.executor') as executor:
+            for _ in range(3):
+                thumbnail_url(self.post.image, '960x339', crop='center')
+        self.assertEqual(executor.submit.call_count, 1)
+        _, task, name = executor.submit.call_args[0]
+        task(name)
+        self.assertTrue(thumbnails_ready(self.post.image.name))
+
+    def test_ready_thumbnail_matches_sorl(self):
+        """Готовая миниатюра ищется под тем же именем, что дает sorl"""
+        name = self.post.image.name
+        for geometry, options in settings.POST_THUMBNAILS:
+            self.assertIsNone(
+                ready_backend.get_ready_thumbnail(name, geometry, **options)
+            )
+            created = get_thumbnail(name, geometry, **options)
+            ready = ready_backend.get_ready_thumbnail(
+                name, geometry, **options
+            )
+            self.assertEqual(ready.name, created.name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIZE=100)
+class ImagePipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='pipeline_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def upload(self):
+        photo = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        Image.new('RGB', (400, 200), 'red').save(photo, 'JPEG', exif=exif)
+        return SimpleUploadedFile(
+            name='photo.jpg', content=photo.getvalue(),
+            content_type='image/jpeg',
+        )
+
+    def test_original_downsized_and_reencoded(self):
+        """Оригинал уменьшается, пересжимается без EXIF, размеры в посте"""
+        post = Post.objects.create(
+            author=self.author, text='Фото', image=self.upload()
+        )
+        original = post.image.name
+        process_image(post.pk, original)
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertFalse(default_storage.exists(original))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (100, 50))
+            self.assertFalse(image.getexif())
+        self.assertTrue(thumbnails_ready(post.image.name))
+
+    def test_replaced_image_left_alone(self):
+        """Обработка устаревшей картинки не трогает пост"""
+        post = Post.objects.create(
+            author=self.author, text='Фото', image=self.upload()
+        )
+        original = post.image.name
+        Post.objects.filter(pk=post.pk).update(image='')
+        files = default_storage.listdir('posts')[1]
+        process_image(post.pk, original)
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(default_storage.listdir('posts')[1], files)
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..importer import Importer, read_records
+from ..follow_graph import graph
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+from ..search import SearchResults
+
+RECORDS = [
+    {'type': 'follow', 'user': 'reader', 'author': 'writer'},
+    {'type': 'post', 'id': 'a1', 'author': 'writer', 'group': 'old-group',
+     'text': 'Перенесенный пост', 'pub_date': '2015-03-01T10:00:00'},
+    {'type': 'comment', 'post': 'a1', 'author': 'reader',
+     'text': 'Старый комментарий', 'created': '2015-03-02T10:00:00'},
+    {'type': 'post', 'id': 'a2', 'author': 'reader', 'text': 'Второй пост'},
+    {'type': 'comment', 'post': 'missing', 'author': 'reader', 'text': '?'},
+]
+
+
+class ImportContentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp, 'content.jsonl')
+        with open(cls.path, 'w') as target:
+            for record in RECORDS:
+                target.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_import_recomputes_derived_data(self):
+        """Импорт сохраняет даты и пересчитывает счетчики, ленты и поиск"""
+        errors = StringIO()
+        graph.sync()
+        call_command(
+            'import_content', self.path, '--chunk-size', '2',
+            stdout=StringIO(), stderr=errors,
+        )
+        self.assertIn('Строка 5', errors.getvalue())
+        post = Post.objects.get(text='Перенесенный пост')
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, Group.objects.get(slug='old-group'))
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Comment.objects.get().created.year, 2015)
+        writer = User.objects.get(username='writer')
+        self.assertFalse(writer.has_usable_password())
+        self.assertEqual(writer.counters.followers_count, 1)
+        reader = User.objects.get(username='reader')
+        self.assertTrue(graph.follows(reader.pk, writer.pk))
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user__username='reader', post=post
+            ).exists()
+        )
+        self.assertEqual(list(SearchResults('перенесенный')[0:1]), [post])
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск с журналом не дублирует записи"""
+        checkpoint = os.path.join(self.tmp, 'checkpoint.jsonl')
+        with open(self.path) as source:
+            records = list(read_records(source, 'jsonl'))
+        Importer(checkpoint, chunk_size=3).run(iter(records[:3]))
+        importer = Importer(checkpoint, chunk_size=3)
+        self.assertEqual(importer.checkpoint.line, 3)
+        importer.run(iter(records))
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        os.remove(checkpoint)
+
+    def test_taken_keys_reported_as_errors(self):
+        """Занятые id и повторные подписки — ошибки, а не импортированные"""
+        with open(self.path) as source:
+            records = list(read_records(source, 'jsonl'))
+        Importer().run(iter(records))
+        importer = Importer()
+        Post.objects.create(
+            pk=importer.next_ids['post'],
+            author=User.objects.get(username='reader'),
+            text='Пост, опубликованный во время импорта',
+        )
+        stats = importer.run(iter(records))
+        self.assertEqual(stats, {'post': 1, 'comment': 0, 'follow': 0})
+        errors = dict(importer.errors)
+        self.assertEqual(errors[1], 'подписка уже есть')
+        self.assertIn('занят другим постом', errors[2])
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(Follow.objects.count(), 1)
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='planned_author')
+        cls.reader = User.objects.create_user(username='planned_reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.group = Group.objects.create(
+            title='Группа', slug='planned-group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+            reverse('posts:follow_index'),
+        )
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def test_feed_queries_use_indexes(self):
+        """Сортированные запросы страниц обходятся без временной сортировки"""
+        cache.clear()
+        for url in self.urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.reader_client.get(url)
+                sorted_queries = [
+                    query['sql'] for query in context.captured_queries
+                    if query['sql'].startswith('SELECT')
+                    and 'ORDER BY' in query['sql']
+                ]
+                self.assertTrue(sorted_queries)
+                for sql in sorted_queries:
+                    plan = self.query_plan(sql)
+                    self.assertIn('USING', plan, sql)
+                    self.assertNotIn('TEMP B-TREE', plan, sql)
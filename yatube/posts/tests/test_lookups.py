@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from ..lookups import get_group_or_404, get_user_id_or_404
+from ..models import Group, User
+
+
+class LookupCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа', slug='cached-group', description='Описание'
+        )
+        cls.user = User.objects.create_user(username='cached_user')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeated_lookups_skip_database(self):
+        """Повторное разрешение slug и username не ходит в базу"""
+        get_group_or_404(self.group.slug)
+        get_user_id_or_404(self.user.username)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_or_404(self.group.slug), self.group)
+            self.assertEqual(
+                get_user_id_or_404(self.user.username), self.user.pk
+            )
+
+    def test_missing_values_are_cached_until_created(self):
+        """Отсутствие запоминается и сбрасывается при создании объекта"""
+        with self.assertRaises(Http404):
+            get_user_id_or_404('newcomer')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            get_user_id_or_404('newcomer')
+        newcomer = User.objects.create_user(username='newcomer')
+        self.assertEqual(get_user_id_or_404('newcomer'), newcomer.pk)
+
+    def test_rename_invalidates_old_slug(self):
+        """Смена slug убирает группу из кеша по старому адресу"""
+        group = Group.objects.create(
+            title='Другая', slug='old-slug', description='Описание'
+        )
+        get_group_or_404('old-slug')
+        group.slug = 'new-slug'
+        group.save()
+        with self.assertRaises(Http404):
+            get_group_or_404('old-slug')
+        self.assertEqual(get_group_or_404('new-slug').title, 'Другая')
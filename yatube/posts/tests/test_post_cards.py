@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Group, Post, User
+from ..templatetags.post_cards import post_cards
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='card_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='card-group', description='Описание'
+        )
+        Post.objects.create(author=cls.author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def cards(self, **flags):
+        posts = Post.objects.select_related('author', 'group')
+        return [card for _, card in post_cards(posts, **flags)]
+
+    def test_cards_reused_from_cache(self):
+        """Повторный рендер берет карточки из кеша"""
+        first = self.cards()
+        with self.assertTemplateNotUsed('includes/general.html'):
+            self.assertEqual(self.cards(), first)
+
+    def test_variants_cached_separately(self):
+        """Варианты карточки без ссылок кешируются отдельно"""
+        self.assertIn('все записи группы', self.cards()[0])
+        self.assertNotIn(
+            'все записи группы', self.cards(hide_group_link=True)[0]
+        )
+
+    def test_group_change_refreshes_cards(self):
+        """Смена slug группы обновляет карточки ее постов"""
+        self.cards()
+        self.group.slug = 'renamed-group'
+        self.group.save()
+        self.assertIn('/group/renamed-group/', self.cards()[0])
+
+    def test_author_rename_refreshes_cards(self):
+        """Смена имени автора обновляет карточки его постов"""
+        self.cards()
+        self.author.first_name = 'Лев'
+        self.author.last_name = 'Толстой'
+        self.author.save()
+        self.assertIn('Лев Толстой', self.cards()[0])
+
+    def test_unrelated_changes_keep_cards(self):
+        """Изменения, не видные в карточке, не трогают посты"""
+        edited = Post.objects.get().edited
+        author = User.objects.get(pk=self.author.pk)
+        author.set_password('new-password')
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.description = 'Новое описание'
+        group.save()
+        self.assertEqual(Post.objects.get().edited, edited)
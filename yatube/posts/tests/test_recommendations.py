@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, Suggestion, User
+from ..recommendations import (build_suggestions, similar_authors,
+                               suggestions_for)
+
+
+@override_settings(SUGGESTIONS_PER_USER=3, SUGGESTIONS_SHOWN=2)
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.friend_of_friend, cls.cook, cls.chef = (
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'fof', 'cook', 'chef')
+        )
+        Follow.objects.bulk_create([
+            Follow(user=cls.reader, author=cls.friend),
+            Follow(user=cls.friend, author=cls.friend_of_friend),
+            Follow(user=cls.reader, author=cls.cook),
+        ])
+        kitchen = Group.objects.create(
+            title='Кухня', slug='kitchen', description='Рецепты'
+        )
+        Post.objects.bulk_create(
+            Post(author=author, group=kitchen, text='Рецепт')
+            for author in (cls.cook, cls.chef)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def suggested(self, user):
+        return list(
+            Suggestion.objects.filter(user=user)
+            .values_list('author__username', flat=True)
+        )
+
+    def test_friends_of_friends_and_similar_authors(self):
+        """Предлагаются друзья друзей и авторы из тех же групп"""
+        build_suggestions()
+        self.assertEqual(
+            set(self.suggested(self.reader)), {'fof', 'chef'}
+        )
+        self.assertIn('chef', self.suggested(self.cook))
+        self.assertNotIn('friend', self.suggested(self.reader))
+
+    def test_new_user_gets_popular_authors(self):
+        """Пользователю без подписок предлагаются популярные авторы"""
+        newcomer = User.objects.create_user(username='newcomer')
+        call_command('recount_counters', stdout=StringIO())
+        call_command('build_suggestions', stdout=StringIO())
+        self.assertEqual(len(self.suggested(newcomer)), 3)
+
+    @override_settings(TIMELINE_BATCH_SIZE=2)
+    def test_suggestions_written_in_batches(self):
+        """Рекомендации пишутся пачками, и все они учтены"""
+        with CaptureQueriesContext(connection) as queries:
+            total = build_suggestions()
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT')
+        ]
+        self.assertEqual(total, Suggestion.objects.count())
+        self.assertEqual(len(inserts), (total + 1) // 2)
+
+    def test_similar_candidates_capped_per_group(self):
+        """Похожие авторы ищутся среди самых активных авторов группы"""
+        posting = {1: {10: 5}, 2: {10: 3}, 3: {10: 1}}
+        similar = similar_authors(posting, candidates=2)
+        self.assertEqual({author for _, author in similar[3]}, {1, 2})
+        self.assertEqual([author for _, author in similar[1]], [2])
+
+    def test_widget_single_query_without_followed(self):
+        """Блок рекомендаций на странице подписок — один запрос"""
+        build_suggestions()
+        Follow.objects.create(user=self.reader, author=self.chef)
+        client = Client()
+        client.force_login(self.reader)
+        client.get(reverse('posts:follow_index'))
+        with self.assertNumQueries(1):
+            suggestions = suggestions_for(self.reader)
+        self.assertEqual(suggestions, [self.friend_of_friend])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'], suggestions)
+        self.assertContains(response, 'Кого почитать')
@@ -0,0 +1,52 @@
+from django.contrib.admin.sites import site
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='search_author')
+        cls.both = Post.objects.create(
+            author=cls.author, text='Кошка ловит кошку, кошки повсюду'
+        )
+        cls.once = Post.objects.create(
+            author=cls.author, text='Собака и кошка'
+        )
+        cls.other = Post.objects.create(author=cls.author, text='Про собак')
+        cls.url = reverse('posts:search')
+
+    def search(self, query):
+        response = Client().get(self.url, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_ranked_prefix_search(self):
+        """Находятся посты по началу слова, лучшие совпадения — выше"""
+        self.assertEqual(self.search('кошк'), [self.both, self.once])
+        self.assertEqual(self.search('собак кошка'), [self.once])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        self.other.text = 'Теперь про кошек'
+        self.other.save()
+        self.assertIn(self.other, self.search('кошек'))
+        self.other.delete()
+        self.assertEqual(self.search('кошек'), [])
+
+    def test_empty_and_symbol_queries(self):
+        """Пустой запрос или одни знаки ничего не ломают"""
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('"*:()'), [])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет через полнотекстовый индекс"""
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, _ = model_admin.get_search_results(
+            request, Post.objects.all(), 'собака'
+        )
+        self.assertIn('posts_post_fts', str(queryset.query))
+        self.assertEqual(list(queryset), [self.once])
@@ -0,0 +1,89 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='timeline_author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader = User.objects.create_user(username='timeline_reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки'
+        )
+        cls.follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': cls.author.username}
+        )
+        cls.unfollow_url = reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': cls.author.username},
+        )
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка переносит старые посты, отписка их убирает"""
+        self.reader_client.get(self.follow_url)
+        self.assertEqual(self.feed(), [self.old_post])
+        self.reader_client.get(self.unfollow_url)
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+        self.assertEqual(self.feed(), [])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленту подписчика при публикации"""
+        self.reader_client.get(self.follow_url)
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'}
+        )
+        new_post = Post.objects.get(text='Свежий пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.reader, post=new_post
+            ).exists()
+        )
+        self.assertEqual(self.feed()[0], new_post)
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=1)
+    def test_celebrity_posts_merged_on_read(self):
+        """Посты популярных авторов подмешиваются при чтении"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Пост звезды'}
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            self.feed(),
+            list(Post.objects.filter(author=self.author)),
+        )
+
+    def test_post_created_outside_view_fans_out(self):
+        """Пост, созданный не через форму, тоже попадает в ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост из админки')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed()[0], post)
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=2)
+    def test_author_below_threshold_fans_out(self):
+        """Автор опустился ниже порога — его посты раскладываются по лентам"""
+        other = User.objects.create_user(username='timeline_other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост звезды')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(
+            self.feed(), list(Post.objects.filter(author=self.author))
+        )
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, User
+from ..trending import COMMENT_WEIGHT, decayed, record_post
+
+
+@override_settings(TRENDING_SIZE=2)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='trend_author')
+        cls.reader = User.objects.create_user(username='trend_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='trend-group', description='Описание'
+        )
+        cls.old, cls.quiet, cls.new = (
+            Post.objects.create(author=cls.author, group=cls.group, text=text)
+            for text in ('Старый', 'Тихий', 'Новый')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def trending(self, url):
+        response = self.client.get(url)
+        return response.context['posts']
+
+    def test_comments_lift_post(self):
+        """Комментарии поднимают пост выше более свежих"""
+        url = reverse('posts:trending')
+        self.assertEqual(self.trending(url), [self.new, self.quiet])
+        for _ in range(2):
+            Comment.objects.create(
+                post=self.old, author=self.reader, text='Комментарий'
+            )
+        self.assertEqual(self.trending(url), [self.old, self.new])
+        group_url = reverse(
+            'posts:group_trending', kwargs={'slug': self.group.slug}
+        )
+        self.assertEqual(self.trending(group_url), [self.old, self.new])
+        self.assertEqual(
+            list(self.client.get(url).context['groups']), [self.group]
+        )
+
+    def test_follow_lifts_latest_post(self):
+        """Новый подписчик поднимает последний пост автора"""
+        author = User.objects.create_user(username='followed_author')
+        post = Post.objects.create(author=author, text='Пост автора')
+        before = Post.objects.get(pk=post.pk).trend_score
+        Follow.objects.create(user=self.reader, author=author)
+        self.assertGreater(Post.objects.get(pk=post.pk).trend_score, before)
+
+    @override_settings(TRENDING_HALF_LIFE=60 * 60)
+    def test_activity_decays(self):
+        """Вклад события вдвое меньше через период полураспада"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        now = timezone.now()
+        Post.objects.filter(pk=post.pk).update(trend_score=0)
+        record_post(post.pk, COMMENT_WEIGHT, now)
+        score = Post.objects.get(pk=post.pk).trend_score
+        self.assertAlmostEqual(decayed(score, now), 1.0)
+        self.assertAlmostEqual(
+            decayed(score, now + timedelta(hours=1)), 0.5
+        )
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..utils import CachedCountPaginator, CursorPaginator
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cursor_author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост #{i}') for i in range(25)
+        )
+        # одинаковая дата у всех постов: порядок решает id
+        cls.posts = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_walk_forward_and_back(self):
+        """Курсоры обходят ленту целиком в обе стороны без повторов"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(
+            [post for page in pages for post in page], self.posts
+        )
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_next())
+        self.assertTrue(previous.has_previous())
+
+    def test_first_page_without_count(self):
+        """Первая страница не выполняет COUNT(*)"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(1):
+            page = paginator.page()
+            self.assertFalse(page.has_previous())
+            self.assertTrue(page.has_next())
+
+    def test_broken_cursor_gives_first_page(self):
+        """Испорченный курсор открывает первую страницу"""
+        page = CursorPaginator(Post.objects.all(), 10).page('not-a-cursor')
+        self.assertEqual(list(page), self.posts[:10])
+
+    def test_views_follow_cursor(self):
+        """Ссылка «Следующая» ведет на вторую страницу ленты"""
+        cache.clear()
+        client = Client()
+        url = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+        response = client.get(url)
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'?cursor={next_cursor}')
+        response = client.get(url, {'cursor': next_cursor})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            self.posts[settings.NUMBER_OF_POSTS:settings.NUMBER_OF_POSTS * 2],
+        )
+
+    @override_settings(PAGINATION_PAGE_NUMBER_LIMIT=2, NUMBER_OF_POSTS=5)
+    def test_numbered_pages_hand_off_to_cursor(self):
+        """За пределом нумерованных страниц ссылки ведут по курсору"""
+        cache.clear()
+        url = reverse('posts:index')
+        response = Client().get(url, {'page': 2})
+        page = response.context['page_obj']
+        self.assertEqual(list(page), self.posts[5:10])
+        self.assertNotContains(response, 'page=3"')
+        self.assertNotContains(response, 'page=5"')
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+        response = Client().get(url, {'cursor': page.next_cursor})
+        self.assertEqual(
+            list(response.context['page_obj']), self.posts[10:15]
+        )
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='count_author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост #{i}') for i in range(30)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_cached(self):
+        """Число постов считается один раз за время жизни кеша"""
+        CachedCountPaginator(Post.objects.order_by('pk'), 10).count
+        Post.objects.create(author=self.author, text='Еще один')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                CachedCountPaginator(Post.objects.order_by('pk'), 10).count,
+                30,
+            )
+
+    @override_settings(PAGINATION_WINDOW=1)
+    def test_page_window(self):
+        """Навигация показывает окно вокруг текущей страницы и края"""
+        paginator = CachedCountPaginator(Post.objects.order_by('pk'), 1)
+        self.assertEqual(
+            list(paginator.page(15).page_window),
+            [1, None, 14, 15, 16, None, 30],
+        )
+        self.assertEqual(
+            list(paginator.page(2).page_window), [1, 2, 3, None, 30]
+        )
+        self.assertEqual(
+            list(CachedCountPaginator(Post.objects.all(), 10).page(1)
+                 .page_window),
+            [1, 2, 3],
+        )
+
+    @override_settings(
+        PAGINATION_MODE='pages', PAGINATION_WINDOW=1, NUMBER_OF_POSTS=1
+    )
+    def test_template_renders_window(self):
+        """Шаблон не выводит ссылку на каждую страницу"""
+        response = Client().get(reverse('posts:index'), {'page': 2})
+        self.assertContains(response, 'page=3"')
+        self.assertContains(response, 'page=30"')
+        self.assertNotContains(response, 'page=10"')
+        self.assertContains(response, '…')
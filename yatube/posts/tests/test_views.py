@@ -161,10 +161,11 @@ class PostPagesTests(TestCase):
         '''Проверка кеша главной страницы'''
         cache.clear()
         response_1 = self.guest_client.get(self.post_index)
-        Post.objects.all().delete()
+        # update() не отправляет сигналы, поэтому страница берется из кеша
+        Post.objects.update(text='Измененный текст')
         response_2 = self.guest_client.get(self.post_index)
         self.assertEqual(response_1.content, response_2.content)
-        cache.clear()
+        Post.objects.all().delete()
         response_3 = self.guest_client.get(self.post_index)
         self.assertNotEqual(response_1.content, response_3.content)
 
@@ -0,0 +1,175 @@
+from itertools import islice
+
+from django.conf import settings
+
+from .feed_cache import bump, timeline_scope
+from .models import Follow, Post, TimelineEntry, UserCounters
+from .utils import CursorPaginator, keyset_filter
+
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+
+
+def is_celebrity(author_id):
+    threshold = settings.TIMELINE_FANOUT_THRESHOLD
+    return (
+        threshold is not None
+        and UserCounters.objects.filter(
+            user_id=author_id, followers_count__gte=threshold
+        ).exists()
+    )
+
+
+def followed_celebrity_ids(user):
+    """Авторы из подписок пользователя, которых не раскладывают по лентам."""
+    threshold = settings.TIMELINE_FANOUT_THRESHOLD
+    if threshold is None:
+        return []
+    return list(
+        UserCounters.objects.filter(
+            user__following__user=user, followers_count__gte=threshold
+        ).values_list('user_id', flat=True)
+    )
+
+
+def timeline_readers(post_id):
+    """Читатели, в чьих лентах лежит пост (у «звезд» таких нет)."""
+    return list(
+        TimelineEntry.objects.filter(post_id=post_id).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+def expire_timelines(user_ids):
+    bump(*(timeline_scope(user_id) for user_id in user_ids))
+
+
+def _entries(user_ids, posts):
+    return (
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id in user_ids
+        for post_id, author_id, pub_date in posts
+    )
+
+
+def _bulk_create(entries):
+    while True:
+        batch = list(islice(entries, settings.TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Кладет новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )
+    )
+    _bulk_create(
+        _entries(followers, [(post.pk, post.author_id, post.pub_date)])
+    )
+    bump(*(timeline_scope(user_id) for user_id in followers))
+
+
+def backfill(user, author_id):
+    """Переносит в ленту подписчика уже опубликованные посты автора."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'author_id', 'pub_date'
+    )
+    _bulk_create(_entries([user.pk], posts.iterator()))
+    bump(timeline_scope(user.pk))
+
+
+def prune(user, author_id):
+    TimelineEntry.objects.filter(user=user, author_id=author_id).delete()
+    bump(timeline_scope(user.pk))
+
+
+def author_unfollowed(author_id):
+    """Отписка опустила автора ниже порога: раскладывает его посты.
+
+    Пока автор был «звездой», его новые посты в ленты не попадали, а
+    при чтении подмешиваются только посты «звезд».
+    """
+    threshold = settings.TIMELINE_FANOUT_THRESHOLD
+    if threshold is None or not UserCounters.objects.filter(
+        user_id=author_id, followers_count=threshold - 1
+    ).exists():
+        return
+    fill_timelines(author_id)
+    expire_timelines(
+        Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+def fill_timelines(author_id=None):
+    """Раскладывает по лентам все посты, например после импорта."""
+    threshold = settings.TIMELINE_FANOUT_THRESHOLD
+    posts = Post.objects.filter(author__following__isnull=False)
+    if author_id is not None:
+        posts = posts.filter(author_id=author_id)
+    if threshold is not None:
+        posts = posts.exclude(author__counters__followers_count__gte=threshold)
+    rows = posts.values_list(
+        'author__following__user_id', 'pk', 'author_id', 'pub_date'
+    )
+    _bulk_create(
+        TimelineEntry(user_id=user_id, post_id=post_id,
+                      author_id=author_id, pub_date=pub_date)
+        for user_id, post_id, author_id, pub_date in rows.iterator()
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: материализованные записи плюс посты «звезд»."""
+
+    def __init__(self, user, per_page):
+        self.user = user
+        self.celebrity_ids = followed_celebrity_ids(user)
+        super().__init__(
+            Post.objects.select_related('author', 'group').filter(
+                author_id__in=self.celebrity_ids
+            ),
+            per_page,
+        )
+
+    def fetch(self, values, backwards, limit):
+        entries = TimelineEntry.objects.filter(user=self.user).select_related(
+            'post__author', 'post__group'
+        )
+        if values is not None:
+            entries = entries.filter(
+                keyset_filter(TIMELINE_ORDERING, values, backwards)
+            )
+        entries = entries.order_by(*TIMELINE_ORDERING)
+        if backwards:
+            entries = entries.reverse()
+        posts = [entry.post for entry in entries[:limit]]
+        if not self.celebrity_ids:
+            return posts
+        merged = {post.pk: post for post in posts}
+        for post in super().fetch(values, backwards, limit):
+            merged.setdefault(post.pk, post)
+        return sorted(
+            merged.values(),
+            key=self.cursor_values,
+            reverse=not backwards,
+        )[:limit]
+
+
+def make_timeline_page(request):
+    paginator = TimelinePaginator(request.user, settings.NUMBER_OF_POSTS)
+    return paginator.get_page(request.GET.get('cursor'))
@@ -0,0 +1,90 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .models import Group, Post
+
+# вес событий: публикация, комментарий, новый подписчик автора
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 2.0
+# начало отсчета; оценки хранятся в логарифмах и не переполняются
+EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _log_weight(weight, when):
+    """ln(w * e^((t - EPOCH) / tau)): вклад события в хранимую оценку."""
+    tau = settings.TRENDING_HALF_LIFE / math.log(2)
+    return math.log(weight) + (when - EPOCH).total_seconds() / tau
+
+
+def _added(log_weight):
+    """ln(e^trend_score + e^log_weight) одним UPDATE, без переполнения."""
+    high = Greatest(F('trend_score'), Value(log_weight))
+    low = Least(F('trend_score'), Value(log_weight))
+    return high + Ln(Value(1.0) + Exp(low - high))
+
+
+def decayed(score, now=None):
+    """Сумма весов событий с учетом затухания к моменту now."""
+    return math.exp(score - _log_weight(1.0, now or timezone.now()))
+
+
+def initial_score(when=None):
+    return _log_weight(POST_WEIGHT, when or timezone.now())
+
+
+def record(posts, weight, when=None):
+    """Добавляет событие к оценке постов и их групп: два UPDATE.
+
+    Хранимая оценка — логарифм суммы весов событий, каждый из которых
+    умножен на e^(t / tau). Все оценки затухают с одной скоростью,
+    поэтому порядок по ней совпадает с порядком по затухшим оценкам,
+    и старые записи не нужно пересчитывать.
+    """
+    score = _added(_log_weight(weight, when or timezone.now()))
+    Post.objects.filter(pk__in=posts).update(trend_score=score)
+    Group.objects.filter(posts__in=posts).update(trend_score=score)
+
+
+def record_post(post_id, weight, when=None):
+    record(Post.objects.filter(pk=post_id).values('pk'), weight, when)
+
+
+def record_author(author_id, weight, when=None):
+    """Подписка на автора поднимает его последний пост."""
+    record(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-id')
+        .values('pk')[:1],
+        weight,
+        when,
+    )
+
+
+def record_group(group_id, weight, when=None):
+    """Новый пост поднимает свою группу."""
+    Group.objects.filter(pk=group_id).update(
+        trend_score=_added(_log_weight(weight, when or timezone.now()))
+    )
+
+
+def trending_posts(group=None):
+    """Лучшие TRENDING_SIZE постов сайта или группы по индексу оценки."""
+    posts = Post.objects.select_related('author', 'group')
+    if group is not None:
+        posts = posts.filter(group=group)
+    return list(
+        posts.order_by('-trend_score', '-id')[:settings.TRENDING_SIZE]
+    )
+
+
+def trending_groups():
+    return list(
+        Group.objects.filter(trend_score__gt=0)
+        .order_by('-trend_score', '-id')[:settings.TRENDING_SIZE]
+    )
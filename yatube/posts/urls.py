@@ -1,24 +1,86 @@
+from core.middleware import query_budget
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
+# бюджет — сколько SQL-запросов view может сделать за один запрос,
+# включая загрузку сессии и пользователя
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('create/', views.post_create, name='post_create'),
-    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('', query_budget(views.index, 3), name='index'),
+    path('trending/', query_budget(views.trending, 4), name='trending'),
+    path(
+        'group/<slug:slug>/trending/',
+        query_budget(views.group_trending, 4),
+        name='group_trending',
+    ),
+    path(
+        'group/<slug:slug>/',
+        query_budget(views.group_posts, 4),
+        name='group_list',
+    ),
+    path(
+        'profile/<str:username>/',
+        query_budget(views.profile, 6),
+        name='profile',
+    ),
+    path(
+        'posts/<int:post_id>/',
+        query_budget(views.post_detail, 5),
+        name='post_detail',
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        query_budget(views.post_comments, 4),
+        name='post_comments',
+    ),
+    path('feed/rss/', query_budget(feeds.site_rss, 1), name='site_rss'),
+    path('feed/atom/', query_budget(feeds.site_atom, 1), name='site_atom'),
+    path(
+        'group/<slug:slug>/rss/',
+        query_budget(feeds.group_rss, 2),
+        name='group_rss',
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        query_budget(feeds.group_atom, 2),
+        name='group_atom',
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        query_budget(feeds.author_rss, 3),
+        name='author_rss',
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        query_budget(feeds.author_atom, 3),
+        name='author_atom',
+    ),
+    path('search/', query_budget(views.search, 5), name='search'),
+    path(
+        'export/<str:kind>/',
+        query_budget(views.export, 2),
+        name='export',
+    ),
+    path('create/', query_budget(views.post_create, 12), name='post_create'),
+    path(
+        'posts/<int:post_id>/edit/',
+        query_budget(views.post_edit, 8),
+        name='post_edit',
+    ),
     path('posts/<int:post_id>/comment/',
-         views.add_comment,
+         query_budget(views.add_comment, 7),
          name='add_comment'),
-    path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/',
+        query_budget(views.follow_index, 5),
+        name='follow_index',
+    ),
     path('profile/<str:username>/follow/',
-         views.profile_follow,
+         query_budget(views.profile_follow, 14),
          name='profile_follow'),
     path('profile/<str:username>/unfollow/',
-         views.profile_unfollow,
+         query_budget(views.profile_unfollow, 9),
          name='profile_unfollow'),
 ]
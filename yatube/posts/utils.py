@@ -1,8 +1,244 @@
+import base64
+import binascii
+import hashlib
+import json
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from .models import Comment
+
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('-created', '-id')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values, backwards=False):
+    payload = json.dumps(
+        [int(backwards), [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        backwards, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(token)
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values, bool(backwards)
+
+
+def keyset_filter(ordering, values, backwards=False):
+    """Условие «строго после курсора» для лексикографического порядка."""
+    condition = Q()
+    for position, name in enumerate(ordering):
+        field = name.lstrip('-')
+        descending = name.startswith('-') != backwards
+        lookup = f'{field}__lt' if descending else f'{field}__gt'
+        step = Q(**{lookup: values[position]})
+        for previous, value in zip(ordering[:position], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+class WindowPage(Page):
+    @property
+    def page_window(self):
+        return self.paginator.page_window(self.number)
+
+    @property
+    def next_cursor(self):
+        """После последней нумерованной страницы дальше ведет курсор."""
+        paginator = self.paginator
+        if (
+            paginator.page_limit is None
+            or self.number < paginator.page_limit
+            or not self.has_next()
+        ):
+            return None
+        last = self[len(self) - 1]
+        return encode_cursor([
+            getattr(last, name.lstrip('-')) for name in paginator.ordering
+        ])
+
+
+class CachedCountPaginator(Paginator):
+    """Нумерованные страницы: COUNT(*) берется из кеша.
+
+    Число объектов может отставать от базы на PAGINATION_COUNT_TIMEOUT
+    секунд; страница за пределами настоящего конца просто окажется пустой.
+    С page_limit номера выдаются только до этой страницы, дальше —
+    курсор по ordering (см. CursorPaginator).
+    """
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 page_limit=None, ordering=FEED_ORDERING):
+        super().__init__(object_list, per_page)
+        self.count_key = count_key
+        self.page_limit = page_limit
+        self.ordering = ordering
+
+    def _get_page(self, *args, **kwargs):
+        return WindowPage(*args, **kwargs)
+
+    @property
+    def last_page(self):
+        """Номер последней страницы, если до нее можно дойти по номерам."""
+        if self.page_limit is not None and self.num_pages > self.page_limit:
+            return None
+        return self.num_pages
+
+    @property
+    def count(self):
+        if not hasattr(self, '_count'):
+            key = self.count_key or 'page_count:' + hashlib.md5(
+                str(self.object_list.query).encode()
+            ).hexdigest()
+            self._count = cache.get(key)
+            if self._count is None:
+                self._count = super().count
+                cache.set(key, self._count, settings.PAGINATION_COUNT_TIMEOUT)
+        return self._count
+
+    def page_window(self, number, on_each_side=None, on_ends=1):
+        """Номера страниц вокруг текущей и по краям, None — пропуск."""
+        if on_each_side is None:
+            on_each_side = settings.PAGINATION_WINDOW
+        last = self.last_page or self.page_limit
+        if last <= (on_each_side + on_ends) * 2 + 1:
+            yield from range(1, last + 1)
+            return
+        start = max(number - on_each_side, 1)
+        end = min(number + on_each_side, last)
+        if start > on_ends + 2:
+            yield from range(1, on_ends + 1)
+            yield None
+        else:
+            start = 1
+        yield from range(start, end + 1)
+        if end < last - on_ends - 1:
+            yield None
+            yield from range(last - on_ends + 1, last + 1)
+        else:
+            yield from range(end + 1, last + 1)
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} items>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу сортировки: без COUNT(*) и без OFFSET."""
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def cursor_values(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def decode(self, token):
+        values, backwards = decode_cursor(token)
+        if len(values) != len(self.fields):
+            raise InvalidCursor(token)
+        meta = self.object_list.model._meta
+        try:
+            values = [
+                meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidCursor(token)
+        return values, backwards
+
+    def fetch(self, values, backwards, limit):
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(
+                keyset_filter(self.ordering, values, backwards)
+            )
+        if backwards:
+            queryset = queryset.reverse()
+        return list(queryset[:limit])
+
+    def page(self, cursor=None):
+        values, backwards = None, False
+        if cursor:
+            try:
+                values, backwards = self.decode(cursor)
+            except InvalidCursor:
+                pass
+        items = self.fetch(values, backwards, self.per_page + 1)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            items.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = encode_cursor(self.cursor_values(items[-1]))
+        if items and has_previous:
+            previous_cursor = encode_cursor(
+                self.cursor_values(items[0]), backwards=True
+            )
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor):
+        return self.page(cursor)
 
 
 def make_page(request, posts):
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTS)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if settings.PAGINATION_MODE == 'pages' or (
+        page_number
+        and page_number.isdigit()
+        and int(page_number) <= settings.PAGINATION_PAGE_NUMBER_LIMIT
+    ):
+        page_limit = None
+        if settings.PAGINATION_MODE != 'pages':
+            page_limit = settings.PAGINATION_PAGE_NUMBER_LIMIT
+        paginator = CachedCountPaginator(
+            posts.order_by(*FEED_ORDERING), settings.NUMBER_OF_POSTS,
+            page_limit=page_limit,
+        )
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(posts, settings.NUMBER_OF_POSTS)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def make_comments_page(post_id, cursor=None):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    paginator = CursorPaginator(
+        comments, settings.COMMENTS_PER_PAGE, COMMENT_ORDERING
+    )
+    return paginator.get_page(cursor)
@@ -1,13 +1,27 @@
-from django.contrib.auth.decorators import login_required
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from .exporter import FIELDS, export_lines, gzip_stream
+from .feed_cache import (INDEX, author_scope, cache_feed, conditional_feed,
+                         group_scope, post_scope)
+from .follow_graph import graph
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import make_page
+from .images import schedule_image
+from .lookups import (get_group_or_404, get_post_author_id_or_404,
+                      get_user_id_or_404)
+from .models import Follow, Post, User
+from .recommendations import suggestions_for
+from .search import SearchResults
+from .timeline import backfill, make_timeline_page, prune
+from .trending import trending_groups, trending_posts
+from .utils import CachedCountPaginator, make_comments_page, make_page
 
 
-@cache_page(20, key_prefix='index_page')
+@cache_feed(lambda: (INDEX,))
 def index(request):
     posts = Post.objects.select_related('group', 'author')
     return render(
@@ -15,8 +29,51 @@ def index(request):
     )
 
 
+def trending(request):
+    return render(
+        request,
+        'posts/trending.html',
+        {
+            'posts': trending_posts(),
+            'groups': trending_groups(),
+            'hide_group_link': False,
+        },
+    )
+
+
+def group_trending(request, slug):
+    group = get_group_or_404(slug)
+    return render(
+        request,
+        'posts/trending.html',
+        {
+            'group': group,
+            'posts': trending_posts(group),
+            'hide_group_link': True,
+        },
+    )
+
+
+def group_feed_scopes(slug):
+    return (group_scope(get_group_or_404(slug).pk),)
+
+
+def profile_scopes(username):
+    return (author_scope(get_user_id_or_404(username)),)
+
+
+def post_scopes(post_id):
+    # карточка поста показывает число постов автора
+    return (
+        post_scope(post_id),
+        author_scope(get_post_author_id_or_404(post_id)),
+    )
+
+
+@conditional_feed(group_feed_scopes)
+@cache_feed(group_feed_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_group_or_404(slug)
     posts = group.posts.select_related('author')
     return render(
         request,
@@ -25,15 +82,19 @@ def group_posts(request, slug):
     )
 
 
+@conditional_feed(profile_scopes)
+@cache_feed(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('counters'),
+        pk=get_user_id_or_404(username),
+    )
     posts = Post.objects.select_related('group', 'author').filter(
-        author__username=username
+        author=author
     )
     following = False
     if request.user.is_authenticated and author != request.user:
-        following = Follow.objects.filter(
-            user=request.user, author=author).exists()
+        following = graph.follows(request.user.pk, author.pk)
     return render(
         request,
         'posts/profile.html',
@@ -45,12 +106,13 @@ def profile(request, username):
     )
 
 
+@conditional_feed(post_scopes)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related('author', 'group'),
+        Post.objects.select_related('author__counters', 'group'),
         id=post_id
     )
-    comments = post.comments.all().select_related('author')
+    comments = make_comments_page(post.pk)
     form = CommentForm()
     author = request.user.id
     return render(
@@ -63,6 +125,39 @@ def post_detail(request, post_id):
     )
 
 
+@conditional_feed(post_scopes)
+def post_comments(request, post_id):
+    return render(
+        request,
+        'includes/comments.html',
+        {
+            'post_id': post_id,
+            'comments': make_comments_page(
+                post_id, request.GET.get('cursor')
+            ),
+        },
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = SearchResults(query)
+    paginator = CachedCountPaginator(
+        results,
+        settings.NUMBER_OF_POSTS,
+        count_key=results.count_key,
+    )
+    return render(
+        request,
+        'posts/search.html',
+        {
+            'query': query,
+            'page_obj': paginator.get_page(request.GET.get('page')),
+            'page_query': urlencode({'q': query}) + '&',
+        },
+    )
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -74,6 +169,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        schedule_image(post)
         return redirect('posts:profile', username=request.user)
     form = PostForm()
     return render(request, 'posts/create_post.html', {'form': form})
@@ -89,6 +185,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_image(post)
         return redirect('posts:post_detail', post_id=post_id)
     author = post.author
     if author != request.user:
@@ -110,26 +208,51 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
     return render(
         request,
         'posts/follow.html',
         {
-            'page_obj': make_page(request, posts),
+            'page_obj': make_timeline_page(request),
+            'suggestions': suggestions_for(request.user),
         },
     )
 
 
 @login_required
 def profile_follow(request, username):
-    author = User.objects.get(username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+    author_id = get_user_id_or_404(username)
+    if request.user.pk != author_id:
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author_id=author_id
+        )
+        if created:
+            backfill(request.user, author_id)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = User.objects.get(username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    author_id = get_user_id_or_404(username)
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author_id=author_id
+    ).delete()
+    if deleted:
+        prune(request.user, author_id)
     return redirect('posts:profile', username=username)
+
+
+@user_passes_test(lambda user: user.is_staff)
+def export(request, kind):
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in ('jsonl', 'csv') or kind not in FIELDS:
+        raise Http404
+    lines = export_lines(kind, fmt)
+    filename = f'{kind}.{fmt}'
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if request.GET.get('gzip'):
+        lines = gzip_stream(lines)
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
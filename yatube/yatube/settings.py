@@ -29,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryCountMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +69,21 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# реплики только для чтения: пути к файлам SQLite через запятую
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# сколько секунд после записи чтения клиента идут в основную базу
+REPLICA_PIN_SECONDS: int = 10
+# только что созданная сессия, не найденная в реплике, разлогинила бы
+# пользователя
+REPLICA_EXCLUDED_APPS = ('sessions',)
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -101,7 +118,19 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 NUMBER_OF_POSTS: int = 10
 NUMBER_OF_POSTS_PAGE_TWO: int = 3
+# 'cursor' — переход по курсорам, 'pages' — классические номера страниц
+PAGINATION_MODE: str = 'cursor'
+# до какой страницы ?page=N обслуживается через OFFSET в режиме 'cursor'
+PAGINATION_PAGE_NUMBER_LIMIT: int = 5
+# сколько секунд число объектов для нумерованных страниц берется из кеша
+PAGINATION_COUNT_TIMEOUT: int = 60
+# сколько номеров страниц показывать по обе стороны от текущей
+PAGINATION_WINDOW: int = 2
 POST_URL: int = 0
+API_PAGE_SIZE: int = 20
+COMMENTS_PER_PAGE: int = 20
+# сколько последних записей отдавать в RSS и Atom
+SYNDICATION_ITEMS: int = 20
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -118,3 +147,65 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# общий для всех воркеров кеш в файле SQLite, а перед ним горячие ключи
+# в памяти процесса; без переменной окружения (разработка, тесты) каждый
+# процесс держит свой LocMemCache
+if os.environ.get('YATUBE_CACHE_PATH'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TieredCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'L1_MAX_BYTES': 16 * 1024 * 1024,
+                'L1_TIMEOUT': 10,
+                'VERSIONED_PREFIXES': ('feed_version:',),
+            },
+        },
+        'shared': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': os.environ['YATUBE_CACHE_PATH'],
+            'OPTIONS': {'MAX_ENTRIES': 200000},
+        },
+    }
+
+# авторы с таким числом подписчиков не раскладываются по лентам при
+# публикации, а подмешиваются в ленту подписок при чтении
+TIMELINE_FANOUT_THRESHOLD: int = 1000
+TIMELINE_BATCH_SIZE: int = 500
+
+# «кого почитать»: сколько авторов хранить на пользователя и сколько
+# показывать (часть сохраненных к показу могла уже попасть в подписки)
+SUGGESTIONS_PER_USER: int = 20
+SUGGESTIONS_SHOWN: int = 5
+
+# «Популярное»: за это время вклад комментария или подписки уменьшается
+# вдвое; сколько постов и групп показывать
+TRENDING_HALF_LIFE: int = 6 * 60 * 60
+TRENDING_SIZE: int = 20
+
+LOOKUP_CACHE_TIMEOUT: int = 60 * 60
+# сколько помнить, что группы или пользователя с таким именем нет
+LOOKUP_CACHE_MISS_TIMEOUT: int = 60
+
+# страницы лент сбрасываются сигналами, поэтому время жизни может быть долгим
+FEED_CACHE_TIMEOUT: int = 60 * 60 * 6
+POST_CARD_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+# размеры миниатюр из шаблонов: готовятся в фоне сразу после загрузки
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+IMAGE_WORKERS: int = 2
+# загруженные картинки уменьшаются до этого размера по большей стороне
+# и пересжимаются в IMAGE_FORMAT без метаданных
+IMAGE_MAX_SIZE: int = 2048
+IMAGE_FORMAT: str = 'WEBP'
+IMAGE_QUALITY: int = 80
+
+# одинаковый SQL столько раз за запрос считается признаком N+1
+QUERY_N_PLUS_ONE_THRESHOLD: int = 3
+# превышение бюджета запросов: True — исключение, False — предупреждение
+QUERY_BUDGET_STRICT: bool = False
+# заголовки X-Query-Count и X-Query-Time в ответах: только для отладки,
+# иначе они раскрывают устройство сайта
+QUERY_COUNT_HEADERS: bool = DEBUG